@@ -0,0 +1,100 @@
+"""
+Event loop lag while buyers' copies of a product are built for concurrent sales.
+
+A ticker sleeps 10ms in a loop and records how late it wakes up; that lateness is how long every other
+coroutine of the bot (commands, heartbeats) would have been stalled. The copies are built once inline in
+the coroutines, as a naive /sell would, and once through ArchivePersonaliser's process pool.
+
+    python -m benchmarks.delivery_lag --sales 10 --size 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+import zipfile
+
+from utils.delivery import ArchivePersonaliser, personalise_archive
+
+TICK = 0.01
+
+
+def build_product(path: str, size_mb: int) -> None:
+    # Half compressible source text, half incompressible assets, like a typical product.
+    random.seed(0)
+    words = [f"token{index}" for index in range(500)]
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index in range(size_mb):
+            text = " ".join(random.choice(words) for _ in range(60_000)).encode()[:512 * 1024]
+            archive.writestr(f"org-product-abc1234/src/module{index}.py", text)
+            archive.writestr(f"org-product-abc1234/assets/blob{index}.bin", os.urandom(512 * 1024))
+        archive.comment = b"abc1234"
+
+
+async def measure(build) -> tuple[float, list]:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            lags.append(time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0.1)
+    start = time.perf_counter()
+    await build()
+    elapsed = time.perf_counter() - start
+    done.set()
+    await task
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: list) -> None:
+    ordered = sorted(lags)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    print(f"{name:>6}: built in {elapsed:5.2f}s  loop lag mean {statistics.mean(lags) * 1000:7.1f}ms  "
+          f"p99 {p99 * 1000:7.1f}ms  max {max(lags) * 1000:7.1f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sales", type=int, default=10, help="Concurrent sales of the product.")
+    parser.add_argument("--size", type=int, default=40, help="Product archive size in MB.")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes of the personaliser.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = os.path.join(directory, "product.zip")
+        build_product(source, args.size)
+        sha256 = "0" * 64
+        print(f"product: {os.path.getsize(source) / 1_000_000:.1f} MB, {args.sales} concurrent sales")
+
+        async def inline():
+            async def sale(buyer_id):
+                await asyncio.sleep(0)
+                target = os.path.join(directory, f"inline-{buyer_id}.zip")
+                personalise_archive(source, target, "product", sha256, buyer_id, f"buyer{buyer_id}")
+            await asyncio.gather(*(sale(buyer_id) for buyer_id in range(args.sales)))
+
+        personaliser = ArchivePersonaliser(os.path.join(directory, "deliveries"), workers=args.workers)
+
+        async def pooled():
+            await asyncio.gather(*(
+                personaliser.build("product", source, sha256, buyer_id, f"buyer{buyer_id}")
+                for buyer_id in range(args.sales)
+            ))
+
+        report("inline", *await measure(inline))
+        try:
+            report("pool", *await measure(pooled))
+            report("cached", *await measure(pooled))
+        finally:
+            personaliser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,61 @@
+"""
+Embed splitter on a 100k-line listing, against the previous quadratic implementation.
+
+    python -m benchmarks.embed_splitter --lines 100000
+"""
+import argparse
+import time
+
+import discord
+
+from utils.embed import create_embeds
+
+
+def legacy_create_embeds(description: str, title: str) -> list[discord.Embed]:
+    # The implementation create_embeds replaced, kept verbatim apart from the footer.
+    embeds = []
+    description_limit = 2700
+    current_embed = discord.Embed(color=0, title=title)
+    remaining_lines = description.splitlines()
+    current_description = ""
+
+    while remaining_lines:
+        next_line = remaining_lines[0]
+        if len(current_description) + len(next_line) + 1 <= description_limit:
+            current_description += next_line + "\n"
+            remaining_lines.pop(0)
+        else:
+            current_embed.description = current_description
+            embeds.append(current_embed)
+            current_embed = discord.Embed(color=0)
+            current_description = ""
+
+    if current_description:
+        current_embed.description = current_description
+        embeds.append(current_embed)
+    return embeds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    lines = [f"**{i})** <@{100000000000000000 + i}> | repository-{i}" for i in range(1, args.lines + 1)]
+
+    start = time.perf_counter()
+    messages = list(create_embeds(lines, title="Benchmark", color=0))
+    elapsed = time.perf_counter() - start
+    embeds = sum(len(message) for message in messages)
+    print(f"create_embeds: {elapsed * 1000:.1f} ms, {embeds} embeds in {len(messages)} messages")
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        legacy = legacy_create_embeds("\n".join(lines), title="Benchmark")
+        elapsed = time.perf_counter() - start
+        print(f"legacy:        {elapsed * 1000:.1f} ms, {len(legacy)} embeds in {len(legacy)} messages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Local stand-in for the Pterodactyl application API, enough of it for utils/pterodactyl.py.
+
+It serves the users list (with `filter[email]` and `include=servers`), single users, the servers list and the
+suspend/unsuspend actions, paginated like the panel with `meta.pagination`. Latency, 5xx errors and 429s with
+the panel's rate-limit headers are configurable, and every request is counted per route.
+
+    python -m benchmarks.fake_panel --users 500 --servers-per-user 2 --port 8080
+"""
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+from aiohttp import web
+
+
+def _timestamp() -> str:
+    return datetime.now().isoformat(timespec="microseconds")
+
+
+class FakePanel:
+    def __init__(self, users: int = 500, servers_per_user: int = 2, latency: float = 0.02, jitter: float = 0.01,
+                 error_rate: float = 0.0, rate_limit: int = None, rate_window: float = 60):
+        """
+        :param users: Number of panel users, named user{id}@example.com.
+        :param servers_per_user: Servers owned by every user.
+        :param latency: Base response latency in seconds.
+        :param jitter: Random latency added on top of the base latency, in seconds.
+        :param error_rate: Share of requests answered with a 500.
+        :param rate_limit: Requests allowed per rate window, None to disable the rate limit.
+        :param rate_window: Length of the rate window in seconds.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.requests = Counter()
+        self.errors = Counter()
+        self._window_start = time.time()
+        self._window_count = 0
+
+        now = _timestamp()
+        self.users = {}
+        self.servers = {}
+        self.owners = {}
+        server_id = 1
+        for user_id in range(1, users + 1):
+            self.users[user_id] = {"id": user_id, "email": f"user{user_id}@example.com",
+                                   "username": f"user{user_id}", "updated_at": now}
+            self.owners[user_id] = []
+            for _ in range(servers_per_user):
+                self.servers[server_id] = {"id": server_id, "identifier": f"{server_id:08x}", "user": user_id,
+                                           "name": f"server{server_id}", "suspended": False, "updated_at": now}
+                self.owners[user_id].append(server_id)
+                server_id += 1
+        self.emails = {user["email"]: user_id for user_id, user in self.users.items()}
+
+    def email(self, user_id: int) -> str:
+        return self.users[user_id]["email"]
+
+    def owned(self, user_id: int) -> list:
+        return [self.servers[server_id] for server_id in self.owners[user_id]]
+
+    def _server(self, server: dict) -> dict:
+        return {"object": "server", "attributes": dict(server)}
+
+    def _user(self, user: dict, include_servers: bool) -> dict:
+        attributes = dict(user)
+        if include_servers:
+            attributes["relationships"] = {
+                "servers": {"object": "list", "data": [self._server(server) for server in self.owned(user["id"])]}
+            }
+        return {"object": "user", "attributes": attributes}
+
+    @staticmethod
+    def _page(request: web.Request, records: list, render) -> dict:
+        per_page = min(int(request.query.get("per_page", 50)), 100)
+        page = max(int(request.query.get("page", 1)), 1)
+        total = len(records)
+        items = records[(page - 1) * per_page:page * per_page]
+        return {
+            "object": "list",
+            "data": [render(item) for item in items],
+            "meta": {"pagination": {
+                "total": total,
+                "count": len(items),
+                "per_page": per_page,
+                "current_page": page,
+                "total_pages": max(math.ceil(total / per_page), 1),
+            }},
+        }
+
+    def _rate_limit_headers(self) -> tuple[bool, dict]:
+        if self.rate_limit is None:
+            return False, {}
+        now = time.time()
+        if now - self._window_start >= self.rate_window:
+            self._window_start = now
+            self._window_count = 0
+        reset = self._window_start + self.rate_window
+        headers = {"X-RateLimit-Limit": str(self.rate_limit), "X-RateLimit-Reset": str(int(math.ceil(reset)))}
+        if self._window_count >= self.rate_limit:
+            headers["X-RateLimit-Remaining"] = "0"
+            headers["Retry-After"] = str(max(int(math.ceil(reset - now)), 1))
+            return True, headers
+        self._window_count += 1
+        headers["X-RateLimit-Remaining"] = str(self.rate_limit - self._window_count)
+        return False, headers
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler):
+        route = request.match_info.route.resource.canonical if request.match_info.route.resource else "unknown"
+        self.requests[f"{request.method} {route}"] += 1
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        limited, headers = self._rate_limit_headers()
+        if limited:
+            self.errors[429] += 1
+            return web.json_response({"errors": [{"code": "TooManyRequestsHttpException"}]}, status=429,
+                                     headers=headers)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors[500] += 1
+            return web.json_response({"errors": [{"code": "HttpException"}]}, status=500, headers=headers)
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def list_users(self, request: web.Request) -> web.Response:
+        include_servers = "servers" in request.query.get("include", "").split(",")
+        email = request.query.get("filter[email]")
+        if email is not None:
+            users = [self.users[self.emails[email]]] if email in self.emails else []
+        else:
+            users = list(self.users.values())
+        return web.json_response(self._page(request, users, lambda user: self._user(user, include_servers)))
+
+    async def get_user(self, request: web.Request) -> web.Response:
+        user = self.users.get(int(request.match_info["user_id"]))
+        if user is None:
+            return web.json_response({"errors": [{"code": "NotFoundHttpException"}]}, status=404)
+        include_servers = "servers" in request.query.get("include", "").split(",")
+        return web.json_response(self._user(user, include_servers))
+
+    async def list_servers(self, request: web.Request) -> web.Response:
+        return web.json_response(self._page(request, list(self.servers.values()), self._server))
+
+    async def server_action(self, request: web.Request) -> web.Response:
+        server = self.servers.get(int(request.match_info["server_id"]))
+        if server is None:
+            return web.json_response({"errors": [{"code": "NotFoundHttpException"}]}, status=404)
+        suspended = request.match_info["action"] == "suspend"
+        if server["suspended"] != suspended:
+            server["suspended"] = suspended
+            server["updated_at"] = _timestamp()
+        return web.Response(status=204)
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.middleware])
+        app.router.add_get("/api/application/users", self.list_users)
+        app.router.add_get("/api/application/users/{user_id:\\d+}", self.get_user)
+        app.router.add_get("/api/application/servers", self.list_servers)
+        app.router.add_post("/api/application/servers/{server_id:\\d+}/{action:suspend|unsuspend}", self.server_action)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Serve the panel in the running event loop.
+        :return: Base URL of the panel.
+        """
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+
+    async def stop(self) -> None:
+        await self._runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--servers-per-user", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02, help="Base latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Random extra latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Requests allowed per rate window.")
+    parser.add_argument("--rate-window", type=float, default=60, help="Rate window in seconds.")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    panel = FakePanel(args.users, args.servers_per_user, args.latency, args.jitter, args.error_rate,
+                      args.rate_limit, args.rate_window)
+    web.run_app(panel.app(), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
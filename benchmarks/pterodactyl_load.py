@@ -0,0 +1,120 @@
+"""
+Suspend/unsuspend flows through PterodactylAPI against the local fake panel (benchmarks/fake_panel.py).
+
+Every flow brings all servers of one user into the suspended or unsuspended state, alternating between
+rounds so each flow has work to do. Three setups are compared:
+
+    per-flow   a new client (session and caches) for every flow, like the bot did before the pooled client
+    pooled     one shared client, its resolution cache warming up as users repeat
+    directory  one shared client whose panel directory is synced before the flows start
+
+    python -m benchmarks.pterodactyl_load --flows 2000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+from benchmarks.fake_panel import FakePanel
+from utils.logger import logger
+from utils.pterodactyl import PterodactylAPI
+
+SCENARIOS = ("per-flow", "pooled", "directory")
+
+
+def percentile(values: list, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+async def run_flows(panel: FakePanel, flows: int, concurrency: int, client_for) -> tuple[float, list, int]:
+    users = list(panel.users)
+    jobs = iter(range(flows))
+    latencies = []
+    failed = 0
+
+    async def worker():
+        nonlocal failed
+        for index in jobs:
+            user_id = users[index % len(users)]
+            action = "suspend" if (index // len(users)) % 2 == 0 else "unsuspend"
+            start = time.perf_counter()
+            async with client_for() as api:
+                result = await api.apply_action(panel.email(user_id), action)
+            latencies.append(time.perf_counter() - start)
+            failed += not result.ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, failed
+
+
+class _Shared:
+    # Lends a long-lived client to `async with` without closing it after every flow.
+    def __init__(self, api: PterodactylAPI):
+        self.api = api
+
+    async def __aenter__(self):
+        return self.api
+
+    async def __aexit__(self, exc_type, exc, tb):
+        pass
+
+
+async def scenario(name: str, args) -> None:
+    panel = FakePanel(args.users, args.servers_per_user, args.latency, args.jitter, args.error_rate,
+                      args.rate_limit, args.rate_window)
+    panel_url = await panel.start()
+
+    def new_client():
+        return PterodactylAPI(panel_url=panel_url, api_key="benchmark", limit_per_host=args.limit_per_host,
+                              base_delay=0.1)
+
+    try:
+        if name == "per-flow":
+            elapsed, latencies, failed = await run_flows(panel, args.flows, args.concurrency, new_client)
+        else:
+            async with new_client() as api:
+                if name == "directory":
+                    start = time.perf_counter()
+                    await api.directory.sync()
+                    print(f"  directory sync: {time.perf_counter() - start:.2f}s, "
+                          f"{sum(panel.requests.values())} requests")
+                elapsed, latencies, failed = await run_flows(panel, args.flows, args.concurrency,
+                                                             lambda: _Shared(api))
+    finally:
+        await panel.stop()
+
+    print(f"{name:>10}: {args.flows / elapsed:7.1f} flows/s  "
+          f"p50 {percentile(latencies, 0.5) * 1000:6.1f}ms  p99 {percentile(latencies, 0.99) * 1000:6.1f}ms  "
+          f"mean {statistics.mean(latencies) * 1000:6.1f}ms  failed {failed}")
+    requests = ", ".join(f"{route}={count}" for route, count in sorted(panel.requests.items()))
+    print(f"  requests: {sum(panel.requests.values())} ({requests})")
+    if panel.errors:
+        print(f"  injected errors: {dict(panel.errors)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50, help="Flows in flight at once.")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--servers-per-user", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake panel base latency in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Fake panel random extra latency in seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500.")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Fake panel requests per rate window.")
+    parser.add_argument("--rate-window", type=float, default=60, help="Fake panel rate window in seconds.")
+    parser.add_argument("--limit-per-host", type=int, default=50, help="Connection pool size of the client.")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append",
+                        help="Scenario to run, may be repeated (default: all).")
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    for name in args.scenario or SCENARIOS:
+        await scenario(name, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,116 @@
+"""
+Throughput of the reminder dispatch pipeline against fake Discord routes.
+
+The fakes enforce Discord's documented limits (5 messages per 5 seconds in a channel, 50 requests per
+second globally) and answer with a 429 carrying `retry_after` when a caller exceeds them, like the API does.
+
+    python -m benchmarks.reminder_dispatch --reminders 600
+"""
+import argparse
+import asyncio
+import time
+
+import discord
+
+from utils.dispatcher import ReminderDispatcher
+
+
+class FakeRateLimited(Exception):
+    status = 429
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"429 Too Many Requests (retry after {retry_after:.2f}s)")
+        self.retry_after = retry_after
+
+
+class FakeRoute:
+    def __init__(self, rate: int, per: float, latency: float):
+        self.rate = rate
+        self.per = per
+        self.latency = latency
+        self.calls = []
+        self.rate_limited = 0
+
+    async def hit(self) -> None:
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        self.calls = [call for call in self.calls if now - call < self.per]
+        if len(self.calls) >= self.rate:
+            self.rate_limited += 1
+            raise FakeRateLimited(self.per - (now - self.calls[0]))
+        self.calls.append(now)
+
+
+class FakeChannel:
+    id = 0
+
+    def __init__(self, route: FakeRoute):
+        self.route = route
+        self.embeds = 0
+
+    async def send(self, embed=None, embeds=None, view=None):
+        await self.route.hit()
+        self.embeds += len(embeds) if embeds else 1
+
+
+class FakeUser:
+    def __init__(self, user_id: int, route: FakeRoute):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.route = route
+
+    async def send(self, embed=None, view=None):
+        await self.route.hit()
+
+
+def build_reminders(count: int, dm_route: FakeRoute) -> list:
+    return [
+        (FakeUser(index, dm_route), discord.Embed(title="Subscription Expired", description=f"<@{index}>\n" + "x" * 160))
+        for index in range(count)
+    ]
+
+
+async def sequential(count: int, latency: float) -> float:
+    # The previous loop: one channel copy and one DM per reminder, sleeping out every 429 like discord.py does.
+    channel_route, dm_route = FakeRoute(5, 5, latency), FakeRoute(50, 1, latency)
+    channel = FakeChannel(channel_route)
+    start = time.perf_counter()
+    for user, embed in build_reminders(count, dm_route):
+        for send in (lambda: channel.send(embed=embed), lambda: user.send(embed=embed)):
+            while True:
+                try:
+                    await send()
+                    break
+                except FakeRateLimited as e:
+                    await asyncio.sleep(e.retry_after)
+    return time.perf_counter() - start
+
+
+async def pipelined(count: int, latency: float) -> float:
+    channel_route, dm_route = FakeRoute(5, 5, latency), FakeRoute(50, 1, latency)
+    channel = FakeChannel(channel_route)
+    dispatcher = ReminderDispatcher()
+    start = time.perf_counter()
+    sent, failed = await dispatcher.dispatch(channel, build_reminders(count, dm_route))
+    elapsed = time.perf_counter() - start
+    assert failed == 0 and sent == count and channel.embeds == count
+    print(f"  429s: channel={channel_route.rate_limited} dm={dm_route.rate_limited}")
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reminders", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.05, help="Fake request latency in seconds.")
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    elapsed = await pipelined(args.reminders, args.latency)
+    print(f"pipeline:   {args.reminders} reminders in {elapsed:.1f}s -> {args.reminders / elapsed * 60:.0f} reminders/min")
+    if not args.skip_sequential:
+        elapsed = await sequential(args.reminders, args.latency)
+        print(f"sequential: {args.reminders} reminders in {elapsed:.1f}s -> {args.reminders / elapsed * 60:.0f} reminders/min")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
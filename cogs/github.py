@@ -1,80 +1,198 @@
 import asyncio
+import hashlib
 import os
+import struct
+import tempfile
+import time
+import zipfile
+from datetime import datetime
 
 import aiofiles
 import aiohttp
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord import app_commands
 from utils.config import Config
-from utils.embed import create_embed
+from utils.embed import create_embed, create_embeds, send_embeds
+from utils.github import BULK, INTERACTIVE, RateLimitExceeded, repo_manifest
+from utils.repo_store import local_repos
 from utils.logger import logger
 
 config = Config()
 
+CHUNK_SIZE = 64 * 1024
+PULL_CONCURRENCY = 4
+PROGRESS_INTERVAL = 2
+SYNC_INTERVAL = 6
+# Archives can take minutes, so only a stalled read (not the total duration) times out.
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=None, connect=10, sock_read=60)
 
-async def get_repos() -> list:
-    api_url = f"https://api.github.com/orgs/{config.github_organisation}/repos"
-    headers = {"Authorization": f"token {config.github_token}"}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api_url, headers=headers) as response:
-            if response.status == 200:
-                repos_data = await response.json()
-                return repos_data
-            else:
-                logger.error(f"Failed to get repos. Status: {response.status}")
-                return []
-
-
-async def download_repo(repo_name: str) -> (bool, str):
-    download_url = f"https://api.github.com/repos/{config.github_organisation}/{repo_name}/zipball"
-    headers = {"Authorization": f"token {config.github_token}"}
-    async with aiohttp.ClientSession() as session:
-        async with session.get(download_url, headers=headers) as response:
-            if response.status == 200:
-                projects_dir = "./repositories"
-                if not os.path.exists(projects_dir):
-                    os.makedirs(projects_dir)
-                zip_filename = os.path.join(projects_dir, f"{repo_name}.zip")
-                async with aiofiles.open(zip_filename, "wb") as out_file:
-                    content = await response.read()
-                    await out_file.write(content)
-                logger.info(f"Pulled {repo_name}")
-                return True, f"Repository `{repo_name}` pulled successfully."
-            else:
+
+def format_size(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1000 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000
+
+
+async def get_repos(client: commands.Bot) -> list:
+    try:
+        return await client.github.catalogue.get()
+    except (aiohttp.ClientError, asyncio.TimeoutError, RateLimitExceeded) as e:
+        logger.error(f"Failed to get repos: {e}")
+        return []
+
+
+def verify_archive(path: str) -> str:
+    """
+    Check that a downloaded zipball is a complete archive, every member is read and CRC-checked.
+    :raises zipfile.BadZipFile: If the archive is truncated or corrupt.
+    :return: Commit SHA GitHub stores as the archive comment, or None.
+    """
+    with zipfile.ZipFile(path) as archive:
+        bad_member = archive.testzip()
+        if bad_member is not None:
+            raise zipfile.BadZipFile(f"CRC mismatch in {bad_member}")
+        return archive.comment.decode("ascii", "ignore") or None
+
+
+async def download_repo(api, repo_name: str, on_chunk=None, pushed_at: str = None,
+                        priority: int = INTERACTIVE) -> (bool, str):
+    """
+    Download a repository's zipball into ./repositories and record it in the repository manifest.
+    :param api: The bot's GithubAPI, the download counts against its rate limit budget.
+    :param on_chunk: Optional callable receiving the size of every chunk written, for progress reporting.
+    :param pushed_at: The repository's `pushed_at` from the catalogue, recorded in the manifest.
+    :param priority: INTERACTIVE for a single pull, BULK for syncs.
+    """
+    download_url = f"/repos/{api.organisation}/{repo_name}/zipball"
+    projects_dir = "./repositories"
+    os.makedirs(projects_dir, exist_ok=True)
+    zip_filename = os.path.join(projects_dir, f"{repo_name}.zip")
+    # Stream into a temporary file next to the target, so /sell never sees a partial archive.
+    # The name is unique, a scheduled sync and a manual pull of the same repository must not share it.
+    temp_fd, temp_filename = tempfile.mkstemp(prefix=f".{repo_name}.", suffix=".part", dir=projects_dir)
+    os.close(temp_fd)
+    try:
+        async with api.request("GET", download_url, priority, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status != 200:
                 logger.error(f"Error while trying to pull {repo_name} (status {response.status})")
                 return False, f"Error: {response.status} while pulling `{repo_name}`."
 
+            size = 0
+            digest = hashlib.sha256()
+            async with aiofiles.open(temp_filename, "wb") as out_file:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    await out_file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+                    if on_chunk is not None:
+                        on_chunk(len(chunk))
+            expected = response.content_length
+            if expected is not None and "Content-Encoding" not in response.headers and size != expected:
+                raise zipfile.BadZipFile(f"received {size} of {expected} bytes")
+
+        sha = await asyncio.to_thread(verify_archive, temp_filename)
+        os.replace(temp_filename, zip_filename)
+    except RateLimitExceeded as e:
+        logger.warning(f"Skipped pulling {repo_name}: {e}")
+        return False, f"Error: {e}, `{repo_name}` was not pulled."
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError, zipfile.BadZipFile) as e:
+        logger.error(f"Error while trying to pull {repo_name}: {e}")
+        return False, f"Error: download of `{repo_name}` failed, any previous copy was kept."
+    finally:
+        if os.path.exists(temp_filename):
+            os.remove(temp_filename)
+
+    # The new archive is in place from here on, a bookkeeping failure must not be reported as a failed pull.
+    try:
+        local_repos.add(repo_name, size, os.stat(zip_filename).st_mtime, digest.hexdigest())
+        await repo_manifest.record(repo_name, pushed_at=pushed_at, sha=sha, sha256=digest.hexdigest(), size=size,
+                                   pulled_at=datetime.now().isoformat())
+    except OSError as e:
+        logger.error(f"Pulled {repo_name} but failed to record it in the repository manifest: {e}")
+        return True, f"Repository `{repo_name}` pulled, but the repository manifest could not be updated."
+
+    logger.info(f"Pulled {repo_name} ({size} bytes)")
+    return True, f"Repository `{repo_name}` pulled successfully."
+
+
+async def pull_repos(api, repos: list, on_chunk=None, on_done=None) -> list:
+    """
+    Download repositories as bulk requests, PULL_CONCURRENCY at a time.
+    :param api: The bot's GithubAPI.
+    :param repos: Repository records from the catalogue.
+    :param on_chunk: Optional callable receiving the size of every chunk written.
+    :param on_done: Optional callable (repo_name, success) called as every download finishes.
+    :return: List of (repo_name, success, message) tuples.
+    """
+    semaphore = asyncio.Semaphore(PULL_CONCURRENCY)
+
+    async def pull(repo):
+        async with semaphore:
+            success, message = await download_repo(api, repo["name"], on_chunk, repo.get("pushed_at"), BULK)
+        if on_done is not None:
+            on_done(repo["name"], success)
+        return repo["name"], success, message
+
+    return await asyncio.gather(*(pull(repo) for repo in repos))
+
 
 async def repo_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
-    repos_data = await get_repos()
-    choices = []
-    for repo in repos_data:
-        repo_name = repo.get("name")
-        if current.lower() in repo_name.lower():
-            choices.append(app_commands.Choice(name=repo_name, value=repo_name))
-        if len(choices) >= 25:
-            break
-    return choices
+    # Answered from the in-memory catalogue, which revalidates itself in the background when stale.
+    names = interaction.client.github.catalogue.search(current)
+    return [app_commands.Choice(name=repo_name, value=repo_name) for repo_name in names]
 
 
 async def local_repo_autocomplete(interaction: discord.Interaction, current: str) -> list[app_commands.Choice[str]]:
-    projects_dir = "./repositories"
-    choices = []
-    if os.path.exists(projects_dir):
-        for filename in os.listdir(projects_dir):
-            if filename.endswith(".zip"):
-                local_repo_name = filename[:-4]  # Remove the .zip extension
-                if current.lower() in local_repo_name.lower():
-                    choices.append(app_commands.Choice(name=local_repo_name, value=local_repo_name))
-                if len(choices) >= 25:
-                    break
-    return choices
+    # Answered from the in-memory index of ./repositories, the folder itself is never listed per keystroke.
+    return [app_commands.Choice(name=repo_name, value=repo_name) for repo_name in local_repos.search(current)]
 
 
 class Github(commands.Cog):
     def __init__(self, client: commands.Bot):
         self.client = client
+        self.pushed = {}
+
+    async def cog_load(self) -> None:
+        local_repos.start()
+        self.sync_repos.start()
+
+    def cog_unload(self) -> None:
+        local_repos.stop()
+        self.sync_repos.cancel()
+
+    @tasks.loop(hours=SYNC_INTERVAL)
+    async def sync_repos(self) -> None:
+        # Keep ./repositories fresh by pulling only the repositories pushed since their last pull.
+        repos_data = await get_repos(self.client)
+        stale = repo_manifest.stale(repos_data)
+        if not stale:
+            return
+        results = await pull_repos(self.client.github, stale)
+        failed = [repo_name for repo_name, success, _ in results if not success]
+        logger.info(f"Synced {len(stale) - len(failed)} of {len(stale)} changed repositories"
+                    + (f", failed: {', '.join(failed)}" if failed else ""))
+
+    @sync_repos.before_loop
+    async def before_sync(self) -> None:
+        await self.client.wait_until_ready()
+
+    @commands.Cog.listener()
+    async def on_repo_push(self, repo: dict) -> None:
+        # One download per repository at a time; a push arriving meanwhile is pulled right after it.
+        repo_name = repo["name"]
+        if repo_name in self.pushed:
+            self.pushed[repo_name] = repo
+            return
+        self.pushed[repo_name] = None
+        try:
+            while repo is not None:
+                await download_repo(self.client.github, repo_name, pushed_at=repo.get("pushed_at"), priority=BULK)
+                repo = self.pushed[repo_name]
+                self.pushed[repo_name] = None
+        finally:
+            del self.pushed[repo_name]
 
     @app_commands.command(
         name="pull-repo",
@@ -83,30 +201,73 @@ class Github(commands.Cog):
     @app_commands.autocomplete(repo=repo_autocomplete)
     @app_commands.checks.has_permissions(administrator=True)
     async def pull_repo(self, interaction: discord.Interaction, repo: str):
-        success, message = await download_repo(repo)
-        await interaction.response.send_message(message, ephemeral=True)
+        # Downloading and verifying an archive takes longer than the interaction's 3 second ack.
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        repo_data = next((repo_data for repo_data in self.client.github.catalogue.repos
+                          if repo_data["name"] == repo), {})
+        success, message = await download_repo(self.client.github, repo, pushed_at=repo_data.get("pushed_at"))
+        await interaction.followup.send(message, ephemeral=True)
 
     @app_commands.command(
         name="pull-all-repos",
-        description="Pull all available GitHub repositories."
+        description="Pull the GitHub repositories that changed since their last pull."
     )
+    @app_commands.describe(full="Pull every repository, including unchanged ones.")
     @app_commands.checks.has_permissions(administrator=True)
-    async def pull_all_repos(self, interaction: discord.Interaction):
+    async def pull_all_repos(self, interaction: discord.Interaction, full: bool = False):
+        await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            repos_data = await get_repos()
+            repos_data = await get_repos(self.client)
             if not repos_data:
-                return await interaction.response.send_message("No repositories found to pull.", ephemeral=True)
+                return await interaction.followup.send("No repositories found to pull.", ephemeral=True)
 
-            # Launch downloads concurrently for all repositories
-            tasks = [download_repo(repo.get("name")) for repo in repos_data]
-            results = await asyncio.gather(*tasks)
-            success_count = sum(1 for success, _ in results if success)
-            fail_count = len(results) - success_count
-            summary = f"Pulled {success_count} repositories successfully. Failed: {fail_count}"
-            await interaction.response.send_message(summary, ephemeral=True)
+            targets = repos_data if full else repo_manifest.stale(repos_data)
+            unchanged = len(repos_data) - len(targets)
+            if not targets:
+                return await interaction.followup.send(
+                    f"All {unchanged} repositories are up to date.", ephemeral=True
+                )
+
+            progress = {"done": 0, "failed": 0, "bytes": 0}
+            started = time.monotonic()
+
+            def status() -> str:
+                megabytes = progress["bytes"] / 1_000_000
+                rate = megabytes / max(time.monotonic() - started, 0.001)
+                return (f"Pulled {progress['done'] - progress['failed']}/{len(targets)} repositories "
+                        f"({progress['failed']} failed, {unchanged} unchanged), "
+                        f"{megabytes:.1f} MB at {rate:.1f} MB/s")
+
+            def on_chunk(size: int) -> None:
+                progress["bytes"] += size
+
+            def on_done(repo_name: str, success: bool) -> None:
+                progress["done"] += 1
+                progress["failed"] += not success
+
+            async def report_progress():
+                # Interaction edits are rate limited, so progress is published on an interval.
+                while True:
+                    await asyncio.sleep(PROGRESS_INTERVAL)
+                    try:
+                        await interaction.edit_original_response(content=status())
+                    except discord.HTTPException as e:
+                        logger.warning(f"Failed to update pull progress: {e}")
+
+            reporter = asyncio.create_task(report_progress())
+            try:
+                results = await pull_repos(self.client.github, targets, on_chunk, on_done)
+            finally:
+                reporter.cancel()
+
+            await interaction.edit_original_response(content=status())
+            failures = (f"**{repo_name}**: {message}" for repo_name, success, message in results if not success)
+            if progress["failed"]:
+                await send_embeds(interaction, create_embeds(failures, title="Failed Pulls"), ephemeral=True)
 
         except Exception as e:
             logger.error(f"Something went wrong: {e}")
+            await interaction.followup.send("Something went wrong while pulling the repositories.", ephemeral=True)
 
     @app_commands.command(
         name="list-repos",
@@ -114,14 +275,13 @@ class Github(commands.Cog):
     )
     @app_commands.checks.has_permissions(administrator=True)
     async def list_repos(self, interaction: discord.Interaction):
-        repos_data = await get_repos()
+        repos_data = await get_repos(self.client)
         if not repos_data:
             await interaction.response.send_message("No repositories found.", ephemeral=True)
             return
         repo_names = [repo.get("name") for repo in repos_data]
-        numbered_list = "\n".join(f"**{i})** {name}" for i, name in enumerate(repo_names, start=1))
-        embed = create_embed(title="Repositories", description=numbered_list)
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        numbered_list = (f"**{i})** {name}" for i, name in enumerate(repo_names, start=1))
+        await send_embeds(interaction, create_embeds(numbered_list, title="Repositories"), ephemeral=True)
 
     @app_commands.command(
         name="list-local-repos",
@@ -129,18 +289,70 @@ class Github(commands.Cog):
     )
     @app_commands.checks.has_permissions(administrator=True)
     async def list_local_repos(self, interaction: discord.Interaction):
-        projects_dir = "./repositories"
-        if not os.path.exists(projects_dir):
-            await interaction.response.send_message("Repositories folder does not exist.", ephemeral=True)
-            return
-        repo_files = [filename for filename in os.listdir(projects_dir) if filename.endswith(".zip")]
-        if not repo_files:
+        repo_names = local_repos.names()
+        if not repo_names:
             await interaction.response.send_message("No local repositories found.", ephemeral=True)
             return
-        # Remove the .zip extension and enumerate the list
-        repo_names = [filename[:-4] for filename in repo_files]
-        numbered_list = "\n".join(f"**{i})** {name}" for i, name in enumerate(repo_names, start=1))
-        embed = create_embed(title="Local Repositories", description=numbered_list)
+        numbered_list = (f"**{i})** {name}" for i, name in enumerate(repo_names, start=1))
+        await send_embeds(interaction, create_embeds(numbered_list, title="Local Repositories"), ephemeral=True)
+
+    @app_commands.command(
+        name="github-status",
+        description="Show the GitHub rate limit budget and the repository catalogue."
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def github_status(self, interaction: discord.Interaction):
+        github = self.client.github
+        budget = github.budget
+        embed = create_embed(title="GitHub Status")
+        if budget.remaining is None:
+            embed.add_field(name="Rate Limit:", value="Unknown until the next request", inline=True)
+        else:
+            embed.add_field(name="Rate Limit:", value=f"{budget.remaining}/{budget.limit}", inline=True)
+            embed.add_field(name="Resets:", value=f"<t:{int(budget.reset)}:R>", inline=True)
+        embed.add_field(name="Reserved For Commands:", value=str(budget.reserve), inline=True)
+        embed.add_field(name="Held Pulls:", value=str(budget.waiting), inline=True)
+        embed.add_field(name="Shed Requests:", value=str(budget.shed), inline=True)
+        catalogue = github.catalogue
+        refreshed = "never" if catalogue.refreshed_at is None else \
+            f"{time.monotonic() - catalogue.refreshed_at:.0f}s ago"
+        embed.add_field(name="Repositories:", value=f"{len(catalogue.repos)} (refreshed {refreshed})", inline=True)
+        embed.add_field(name="Local Archives:", value=str(len(local_repos)), inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        name="repo-info",
+        description="Show what a locally stored repository archive contains, without extracting it."
+    )
+    @app_commands.autocomplete(repo=local_repo_autocomplete)
+    @app_commands.checks.has_permissions(administrator=True)
+    async def repo_info(self, interaction: discord.Interaction, repo: str):
+        try:
+            summary = await local_repos.summary(repo)
+        except (OSError, ValueError, struct.error) as e:
+            logger.error(f"Failed to read {repo}.zip: {e}")
+            return await interaction.response.send_message(f"Could not read local repository `{repo}`.",
+                                                           ephemeral=True)
+        if summary is None:
+            return await interaction.response.send_message(f"Local repository `{repo}` not found.", ephemeral=True)
+
+        entry = local_repos.get(repo)
+        manifest_entry = repo_manifest.entries.get(repo, {})
+        embed = create_embed(title=f"Repository {repo}")
+        embed.add_field(name="Files:", value=str(summary["files"]), inline=True)
+        embed.add_field(name="Size:", value=f"{format_size(summary['size'])} "
+                                            f"({format_size(entry['size'])} zipped)", inline=True)
+        embed.add_field(name="Pulled:", value=f"<t:{int(entry['mtime'])}:R>", inline=True)
+        if manifest_entry.get("sha"):
+            embed.add_field(name="Commit:", value=f"`{manifest_entry['sha'][:12]}`", inline=True)
+
+        layout = sorted(summary["layout"].items(), key=lambda item: item[1][1], reverse=True)
+        layout_lines = [f"`{name[:60]}` {count} files, {format_size(size)}" for name, (count, size) in layout[:10]]
+        if len(layout) > 10:
+            layout_lines.append(f"... and {len(layout) - 10} more")
+        embed.add_field(name="Layout:", value="\n".join(layout_lines) or "Empty", inline=False)
+        largest_lines = [f"`{name[-60:]}` {format_size(size)}" for name, size in summary["largest"]]
+        embed.add_field(name="Largest Files:", value="\n".join(largest_lines) or "None", inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
     @app_commands.command(
@@ -155,6 +367,8 @@ class Github(commands.Cog):
         if os.path.exists(target_file):
             try:
                 os.remove(target_file)
+                local_repos.discard(repo)
+                await repo_manifest.remove(repo)
                 logger.info(f"Removed local repository file: {repo}.zip")
                 await interaction.response.send_message(f"Local repository `{repo}` removed successfully.",
                                                         ephemeral=True)
@@ -1,4 +1,3 @@
-import asyncio
 import datetime
 
 import discord
@@ -11,8 +10,9 @@ from utils.config import Config
 from utils.database import mongodb
 from utils.embed import create_embed
 from utils.logger import logger
-from utils.pterodactyl import PterodactylAPI
-from utils.ticket_manager import TicketHandler
+from utils.scheduler import needs_unsuspend, subscription_scheduler
+from utils.stats import subscription_stats
+from utils.ticket_manager import TicketHandler, ticket_pool
 
 config = Config()
 
@@ -21,6 +21,13 @@ class Listener(commands.Cog):
     def __init__(self, client: commands.Bot) -> None:
         self.client = client
 
+    async def cog_load(self) -> None:
+        # Cogs are loaded once the bot is ready, so the ticket categories are cached by now.
+        ticket_pool.start(self.client)
+
+    def cog_unload(self) -> None:
+        ticket_pool.stop()
+
     @commands.Cog.listener()
     async def on_interaction(self, interaction: Interaction) -> None:
         if interaction.type == InteractionType.application_command:
@@ -106,6 +113,8 @@ class Listener(commands.Cog):
             now = datetime.datetime.now()
 
             if result.deleted_count == 1:
+                subscription_scheduler.cancel(confirm_user_id)
+                subscription_stats.invalidate()
                 embed = create_embed(color=discord.Color.dark_red().value, title="Subscription Cancelled",
                                      description=f"Subscription for <@{confirm_user_id}> has been cancelled on {now.strftime('%Y-%m-%d')}.")
                 await interaction.response.edit_message(embed=embed, view=None)
@@ -139,12 +148,17 @@ class Listener(commands.Cog):
             user = self.client.get_user(confirm_user_id)
             next_payment = now + relativedelta(months=interval)
 
-            result = await subs.update_one(
-                {"_id": confirm_user_id},
-                {"$set": {"last_paid": now, "next_payment": next_payment}}
-            )
+            # Only servers suspended for an unpaid period need the panel; legacy documents have no ledger.
+            unsuspend = needs_unsuspend(doc)
+
+            update = {"last_paid": now, "next_payment": next_payment, "overdue_run": False}
+            if unsuspend:
+                update["reminders.unsuspended"] = {"at": now, "period": doc.get("next_payment")}
+            result = await subs.update_one({"_id": confirm_user_id}, {"$set": update})
 
             if result.modified_count == 1:
+                subscription_scheduler.track(confirm_user_id, next_payment)
+                subscription_stats.invalidate()
                 embed = create_embed(title="Payment Confirmed", color=discord.Color.green().value,
                                      description=f"Payment confirmed for <@{confirm_user_id}>.\n"
                                                  f"Last paid: {now.strftime('%Y-%m-%d')}\n"
@@ -161,18 +175,10 @@ class Listener(commands.Cog):
                 else:
                     logger.warning(f"User {confirm_user_id} not found.")
 
-                if email: # Check if the email exists
-                    async with PterodactylAPI() as api:
-                        try:
-                            await api.unsuspend_servers_by_email(email)
-                        except Exception as e:
-                            logger.error(f"Error suspending servers for {email}: {e}")
-                            await asyncio.sleep(15) # Retry after a delay
-                            try:
-                                await api.unsuspend_servers_by_email(email)
-                            except Exception as e:
-                                logger.error(f"Failed to suspend servers for {email} after retry: {e}")
-                else:
+                if unsuspend and email: # Check if the email exists
+                    # The durable queue runs the panel calls; the interaction never waits on the panel.
+                    await self.client.server_actions.enqueue(email, "unsuspend", user_id=confirm_user_id)
+                elif unsuspend:
                     logger.warning(f"No email found for user {confirm_user_id}.")
             else:
                 await interaction.response.send_message("Failed to update payment information.", ephemeral=True)
@@ -1,3 +1,4 @@
+import asyncio
 import os
 
 import discord
@@ -6,7 +7,10 @@ from discord import app_commands
 
 from cogs.github import local_repo_autocomplete
 from utils.config import Config
+from utils.database import mongodb
+from utils.delivery import ArchivePersonaliser, ProductUploads
 from utils.logger import logger
+from utils.repo_store import hash_file, local_repos
 
 config = Config()
 
@@ -14,25 +18,58 @@ config = Config()
 class SellSystem(commands.Cog):
     def __init__(self, client: commands.Bot):
         self.client = client
+        self.uploads = ProductUploads(mongodb.get_database("ByteScrape")["product_uploads"])
+        self.personaliser = ArchivePersonaliser()
+
+    async def cog_load(self) -> None:
+        await self.uploads.ensure_indexes()
+
+    def cog_unload(self) -> None:
+        self.personaliser.close()
 
     @app_commands.command(
         name="sell",
         description="Select a locally downloaded repository to send it in the channel."
     )
     @app_commands.autocomplete(repo=local_repo_autocomplete)
+    @app_commands.describe(buyer="Stamp the copy with a licence for this buyer.")
     @app_commands.checks.has_permissions(administrator=True)
-    async def sell(self, interaction: discord.Interaction, repo: str):
+    async def sell(self, interaction: discord.Interaction, repo: str, buyer: discord.Member = None):
         projects_dir = "./repositories"
         file_path = os.path.join(projects_dir, f"{repo}.zip")
         if not os.path.exists(file_path):
             await interaction.response.send_message(f"Local repository `{repo}` not found.", ephemeral=True)
             return
+        content = f"Here's the Product **{repo}**:"
         try:
+            await interaction.response.defer(thinking=True)
+            # The indexed hash is only trusted while the file on disk is the one that was hashed.
+            entry = local_repos.get(repo)
+            stat = os.stat(file_path)
+            sha256 = None
+            if entry is not None and (entry["size"], entry["mtime"]) == (stat.st_size, stat.st_mtime):
+                sha256 = entry["sha256"]
+            if sha256 is None:
+                sha256 = await asyncio.to_thread(hash_file, file_path)
+
+            product = repo
+            if buyer is not None:
+                # The buyer's licensed copy is built (or reused) in the worker processes.
+                file_path, sha256 = await self.personaliser.build(repo, file_path, sha256, buyer.id,
+                                                                  buyer.display_name)
+                product = f"{repo}@{buyer.id}"
+                content = f"Here's the Product **{repo}**, licensed to {buyer.mention}:"
+
+            # A product uploaded before is forwarded from that message, only a changed archive is uploaded again.
+            if await self.uploads.forward(self.client, sha256, interaction.channel):
+                await interaction.followup.send(content=content)
+                return
             file = discord.File(file_path, filename=f"{repo}.zip")
-            await interaction.response.send_message(content=f"Here's the Product **{repo}**:", file=file)
+            message = await interaction.followup.send(content=content, file=file, wait=True)
+            await self.uploads.record(sha256, product, message)
         except Exception as e:
             logger.error(f"Error sending repository {repo}: {e}")
-            await interaction.response.send_message("Error sending the repository file.", ephemeral=True)
+            await interaction.followup.send("Error sending the repository file.", ephemeral=True)
 
 
 async def setup(client: commands.Bot) -> None:
@@ -1,52 +1,28 @@
+import io
+import os
+import tempfile
+
 import discord
 from discord.ext import commands, tasks
 from discord import ButtonStyle, app_commands
+from discord.app_commands import Choice
 from discord.ui import Button, View
-from datetime import datetime
+from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from utils.config import Config
 from utils.database import mongodb
+from utils.dispatcher import ReminderDispatcher
 from utils.embed import create_embed
 from utils.logger import logger
-from utils.pterodactyl import PterodactylAPI
+from utils.paginator import CursorPaginator
+from utils.scheduler import (RETRY_DELAY, STAGES, current_stage, handled_stage, needs_unsuspend,
+                             subscription_scheduler)
+from utils.stats import subscription_stats
+from utils.subscription_io import export_subscriptions, import_subscriptions, read_rows
 
 config = Config()
 
 
-def create_embeds(description: str, title: str) -> list[discord.Embed]:
-    embeds = []
-    description_limit = 2700  # maximum characters allowed in the description
-    current_embed = discord.Embed(
-        color=int(config.color, 16),
-        title=title
-    )
-    # Split description lines to try preserving formatting
-    remaining_lines = description.splitlines()
-    current_description = ""
-
-    while remaining_lines:
-        next_line = remaining_lines[0]
-        # Check if we can add this line without exceeding the limit
-        if len(current_description) + len(next_line) + 1 <= description_limit:
-            current_description += next_line + "\n"
-            remaining_lines.pop(0)
-        else:
-            current_embed.description = current_description
-            embeds.append(current_embed)
-            # Create a new embed with the same style
-            current_embed = discord.Embed(color=int(config.color, 16))
-            current_description = ""
-
-    # Append final embed if there's any content left
-    if current_description:
-        current_embed.description = current_description
-        current_embed.timestamp = datetime.now()
-        current_embed.set_footer(text=config.footer_text, icon_url=config.footer_icon)
-        embeds.append(current_embed)
-
-    return embeds
-
-
 def build_expired_embed(due_date: datetime, price: float, suspended: bool, message: str,
                         user: discord.User) -> discord.Embed:
     embed = create_embed(
@@ -68,84 +44,208 @@ def build_subscription_view() -> View:
     return view
 
 
+def render_subscriptions_page(documents: list, offset: int, page: int) -> discord.Embed:
+    # Create a numbered list with all subscription information
+    lines = []
+    for index, doc in enumerate(documents, start=offset + 1):
+        user_id = doc.get("_id", "Unknown")
+        last_paid = doc.get("last_paid")
+        next_payment = doc.get("next_payment")
+        interval = doc.get("interval", "N/A")  # interval in months
+
+        if isinstance(last_paid, datetime):
+            last_paid = last_paid.strftime("%Y-%m-%d")
+        else:
+            last_paid = str(last_paid) if last_paid else "N/A"
+
+        if isinstance(next_payment, datetime):
+            next_payment = next_payment.strftime("%Y-%m-%d")
+        else:
+            next_payment = str(next_payment) if next_payment else "N/A"
+
+        lines.append(
+            f"**{index}** | ** **User:** <@{user_id}> | **Last Paid:** {last_paid} | **Next Payment:** {next_payment} | **Interval:** {interval} month(s)"
+        )
+
+    return create_embed(title=f"Subscriptions List (Page {page})", description="\n".join(lines))
+
+
+def build_welcome_message(interval: int, next_payment: datetime) -> str:
+    return (
+        f"You have been **subscribed** to the **ByteScrape** service for **{interval} months**. "
+        f"Your subscription will be **renewed** on **{next_payment.strftime('%Y-%m-%d')}**. "
+        f"Please **pay** your **subscription** till 7 days after due date. If not your service will be **suspended**."
+    )
+
+
 class Subscription(commands.Cog):
     def __init__(self, client: commands.Bot) -> None:
         self.client = client
         # Initialize the subscriptions collection from the connected database.
         self.subscriptions = mongodb.get_database("ByteScrape")["subscriptions"]
-        self.check_subscriptions.start()
+        self.dispatcher = ReminderDispatcher()
+
+    async def cog_load(self) -> None:
+        # overdue_run marks subscriptions whose last reminder stage is done for the current billing period.
+        await self.subscriptions.update_many({"overdue_run": {"$exists": False}}, {"$set": {"overdue_run": False}})
+        await self.subscriptions.create_index(
+            [("next_payment", 1)],
+            name="pending_reminders",
+            partialFilterExpression={"overdue_run": False}
+        )
+
+        # Backs the range cursor of /list-subscriptions in both sort directions.
+        await self.subscriptions.create_index([("next_payment", 1), ("_id", 1)], name="next_payment_id")
+
+        # Load every pending due date once; from here on the commands and listener keep the scheduler current.
+        subscription_scheduler.clear()
+        pending = self.subscriptions.find({"overdue_run": False}, {"next_payment": 1, "reminders": 1})
+        async for document in pending.sort("next_payment", 1):
+            due_date = document.get("next_payment")
+            handled = handled_stage(document)
+            if handled:
+                subscription_scheduler.advance(document["_id"], handled, due_date)
+            else:
+                subscription_scheduler.track(document["_id"], due_date)
+        logger.debug(f"Subscription scheduler loaded {len(subscription_scheduler)} subscriptions")
+        subscription_scheduler.start(self.check_subscriptions)
+        if config.pterodactyl_enabled:
+            self.reconcile_servers.start()
+
+    async def claim_stage(self, user_id: int, stage: str, due_date: datetime) -> bool:
+        """
+        Record a reminder stage in the subscription's ledger before acting on it, so a crash
+        can never repeat the stage. Returns False if the stage was already handled for this period.
+        """
+        update = {f"reminders.{stage}": {"at": datetime.now(), "period": due_date}}
+        if stage == STAGES[-1][0]:
+            update["overdue_run"] = True
+        result = await self.subscriptions.update_one(
+            {"_id": user_id, "next_payment": due_date, f"reminders.{stage}.period": {"$ne": due_date}},
+            {"$set": update}
+        )
+        return result.modified_count == 1
 
     def cog_unload(self) -> None:
-        self.check_subscriptions.cancel()
+        subscription_scheduler.stop()
+        self.reconcile_servers.cancel()
 
-    @tasks.loop(hours=int(config.subscription_delay))
-    async def check_subscriptions(self) -> None:
+    async def check_subscriptions(self, due: list) -> None:
+        await self.client.wait_until_ready()
         current_time = datetime.now()
+        user_ids = [user_id for user_id, _, _ in due]
+        reminders = []
 
-        async for document in self.subscriptions.find({"next_payment": {"$lte": current_time}}):
+        async for document in self.subscriptions.find({"_id": {"$in": user_ids}}):
             user_id = document.get("_id")
             due_date = document.get("next_payment")
             price = document.get("price")
             email = document.get("email")
-            user = self.client.get_user(user_id)
 
+            # The stored due date is authoritative, it may have moved since the entry was scheduled.
+            stage = current_stage(due_date, current_time) if due_date else None
+            if stage is None:
+                subscription_scheduler.track(user_id, due_date)
+                continue
+            # Resolve the user before claiming the stage, members are not chunked at startup so the cache often misses.
+            user = self.client.get_user(user_id)
             if user is None:
+                try:
+                    user = await self.client.fetch_user(user_id)
+                except discord.NotFound:
+                    user = None
+                except discord.HTTPException as e:
+                    logger.warning(f"Failed to fetch user {user_id}, retrying the {stage} reminder later: {e}")
+                    subscription_scheduler.requeue([(user_id, stage, due_date)],
+                                                   current_time + timedelta(seconds=RETRY_DELAY))
+                    continue
+            subscription_scheduler.advance(user_id, stage, due_date)
+            if not await self.claim_stage(user_id, stage, due_date):
                 continue
 
-            days_overdue = (current_time - due_date).days
+            # The suspension does not depend on whether the user can be messaged.
+            if stage == "suspended":
+                if email is None:
+                    logger.error(f"No email found for suspended subscription for {user_id}")
+                else:
+                    await self.client.server_actions.enqueue(email, "suspend", user_id=user_id)
+            if user is None:
+                logger.warning(f"User {user_id} no longer exists, skipping the {stage} reminder")
+                continue
 
-            # Prepare the embed message and view based on the overdue duration.
-            if days_overdue == 7:
+            # Prepare the embed message and view based on the reminder stage.
+            if stage == "final_warning":
                 message = (
                     f"{user.mention}\n"
                     "Please renew your subscription to continue enjoying our services, "
                     "your service will be **suspended tomorrow** if you do not pay."
                 )
                 embed = build_expired_embed(due_date, price, suspended=False, message=message, user=user)
-            elif days_overdue > 7:
+            elif stage == "suspended":
                 message = (
                     f"{user.mention}\n"
                     "Please renew your subscription to continue enjoying our services, "
                     "your service will **now** be **suspended**."
                 )
-                embed = build_expired_embed(due_date, price, suspended=False, message=message, user=user)
-                if email is None:
-                    logger.error(f"No email found for suspended subscription for {user.id} | {user.name}")
-                else:
-                    async with PterodactylAPI() as api:
-                        try:
-                            results = await api.suspend_servers_by_email(email)
-                        except Exception as e:
-                            logger.error("Error:", e)
-
-            elif 0 < days_overdue < 7:
+                embed = build_expired_embed(due_date, price, suspended=True, message=message, user=user)
+            else:
                 message = (
                     f"{user.mention}\n"
                     "Please renew your subscription to continue enjoying our services, "
                     "your service will be **suspended** in **7 days**."
                 )
                 embed = build_expired_embed(due_date, price, suspended=False, message=message, user=user)
-            else:
-                # If not overdue or negative days, skip processing.
-                continue
 
-            view = build_subscription_view()
+            reminders.append((user, embed))
 
-            try:
-
-                channel = self.client.get_channel(int(config.subscriptions_id))
-                if channel:
-                    await channel.send(embed=embed)
-                await user.send(embed=embed, view=view)
+        if not reminders:
+            return
+        # One view serves every DM; each embed is shared by its DM and its channel copy.
+        channel = self.client.get_channel(int(config.subscriptions_id))
+        sent, failed = await self.dispatcher.dispatch(channel, reminders, view=build_subscription_view())
+        logger.debug(f"Sent {sent} subscription reminders ({failed} failed)")
 
+    @tasks.loop(hours=int(config.subscription_delay))
+    async def reconcile_servers(self) -> None:
+        # Compare the ledger's desired state with the panel directory and queue only the servers that differ.
+        api = self.client.pterodactyl
+        try:
+            await api.directory.sync()
+        except Exception as e:
+            logger.error(f"Skipping server reconciliation, panel directory sync failed: {e}")
+            return
 
-            except Exception:
-                logger.error(f"Failed to send subscription expired message to {user.id} | {user.name}")
+        # Guard the whole pass, an exception escaping a tasks.loop would end reconciliation for good.
+        try:
+            current_time = datetime.now()
+            queued = 0
+            query = {"email": {"$nin": [None, ""]}, "next_payment": {"$ne": None}}
+            projection = {"email": 1, "next_payment": 1, "overdue_run": 1, "reminders": 1}
+            async for document in self.subscriptions.find(query, projection):
+                if document.get("overdue_run"):
+                    suspended = True
+                elif current_stage(document["next_payment"], current_time) == STAGES[-1][0]:
+                    # The scheduler has yet to run this subscription's suspension stage.
+                    continue
+                elif needs_unsuspend(document):
+                    suspended = False
+                else:
+                    # Not overdue and no suspension by the bot to undo; servers suspended by hand stay suspended.
+                    continue
+
+                states = api.directory.states(document["email"])
+                if not states or all(state is suspended for state in states.values()):
+                    continue
+                action = "suspend" if suspended else "unsuspend"
+                if await self.client.server_actions.enqueue(document["email"], action, user_id=document["_id"]):
+                    queued += 1
+            logger.debug(f"Server reconciliation queued {queued} actions")
+        except Exception as e:
+            logger.error(f"Server reconciliation failed: {e}")
 
-    @check_subscriptions.before_loop
-    async def before_check(self) -> None:
+    @reconcile_servers.before_loop
+    async def before_reconcile(self) -> None:
         await self.client.wait_until_ready()
-        logger.debug("Subscription check task starting...")
 
     @app_commands.command(
         name="add_subscription",
@@ -180,13 +280,11 @@ class Subscription(commands.Cog):
                 "Failed to add subscription. Please try again later.",
                 ephemeral=True
             )
+        subscription_scheduler.track(int(user.id), next_payment)
+        subscription_stats.invalidate()
 
         try:
-            await user.send(
-                f"You have been **subscribed** to the **ByteScrape** service for **{interval} months**. "
-                f"Your subscription will be **renewed** on **{next_payment.strftime('%Y-%m-%d')}**. "
-                f"Please **pay** your **subscription** till 7 days after due date. If not your service will be **suspended**."
-            )
+            await user.send(build_welcome_message(interval, next_payment))
         except Exception:
             logger.error(f"Failed to send subscription message to {user.id} | {user.name}")
 
@@ -240,6 +338,8 @@ class Subscription(commands.Cog):
                 "Failed to update subscription. Please try again later.",
                 ephemeral=True
             )
+        subscription_scheduler.track(int(user.id), next_payment)
+        subscription_stats.invalidate()
 
         await interaction.response.send_message(
             f"Last paid date for {user.mention} updated to {last_paid_date.strftime('%Y-%m-%d')}. "
@@ -259,6 +359,8 @@ class Subscription(commands.Cog):
         try:
             result = await self.subscriptions.delete_one({"_id": int(user.id)})
             if result.deleted_count == 1:
+                subscription_scheduler.cancel(int(user.id))
+                subscription_stats.invalidate()
                 message = f"Subscription removed for {user.mention}."
             else:
                 message = f"No subscription found for {user.mention}."
@@ -274,49 +376,135 @@ class Subscription(commands.Cog):
         name="list-subscriptions",
         description="List all subscriptions from the database."
     )
+    @app_commands.describe(
+        sort="Order of the listed subscriptions.",
+        overdue="Only list subscriptions whose payment is overdue.",
+        due_within="Only list subscriptions due within this many days."
+    )
+    @app_commands.choices(sort=[
+        Choice(name="Next payment (soonest first)", value="next_payment"),
+        Choice(name="Next payment (latest first)", value="-next_payment"),
+        Choice(name="User", value="_id")
+    ])
     @app_commands.checks.has_permissions(administrator=True)
-    async def list_subscriptions(self, interaction: discord.Interaction) -> None:
-        db = mongodb.get_database("ByteScrape")
-        subs_collection = db["subscriptions"]
-
-        # Retrieve subscriptions (limit to 100 for this example)
-        subscriptions = await subs_collection.find({}).to_list(length=100)
+    async def list_subscriptions(self, interaction: discord.Interaction, sort: Choice[str] = None,
+                                 overdue: bool = False, due_within: int = None) -> None:
+        now = datetime.now()
+        query = {}
+        if overdue and due_within is not None:
+            query["next_payment"] = {"$lte": now + relativedelta(days=due_within)}
+        elif overdue:
+            query["next_payment"] = {"$lte": now}
+        elif due_within is not None:
+            query["next_payment"] = {"$gt": now, "$lte": now + relativedelta(days=due_within)}
+
+        order = sort.value if sort else "next_payment"
+        if order == "_id":
+            sort_keys = [("_id", 1)]
+        else:
+            direction = -1 if order.startswith("-") else 1
+            sort_keys = [("next_payment", direction), ("_id", direction)]
 
-        if not subscriptions:
+        paginator = CursorPaginator(self.subscriptions, query, sort_keys, render=render_subscriptions_page)
+        embed = await paginator.load()
+        if embed is None:
             await interaction.response.send_message("No subscriptions found.", ephemeral=True)
             return
+        await interaction.response.send_message(embed=embed, view=paginator, ephemeral=True)
 
-        # Create a numbered list with all subscription information
-        lines = []
-        for index, doc in enumerate(subscriptions, start=1):
-            user_id = doc.get("_id", "Unknown")
-            last_paid = doc.get("last_paid")
-            next_payment = doc.get("next_payment")
-            interval = doc.get("interval", "N/A")  # interval in months
-
-            if isinstance(last_paid, datetime):
-                last_paid = last_paid.strftime("%Y-%m-%d")
-            else:
-                last_paid = str(last_paid) if last_paid else "N/A"
-
-            if isinstance(next_payment, datetime):
-                next_payment = next_payment.strftime("%Y-%m-%d")
-            else:
-                next_payment = str(next_payment) if next_payment else "N/A"
+    @app_commands.command(
+        name="subscription-stats",
+        description="Show recurring revenue and overdue subscriptions."
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def stats_command(self, interaction: discord.Interaction) -> None:
+        stats = await subscription_stats.overview()
+        totals = stats["totals"]
+        overdue = stats["overdue"]
+
+        embed = create_embed(title="Subscription Stats")
+        embed.add_field(name="Subscriptions:", value=str(totals["subscriptions"]), inline=True)
+        embed.add_field(name="Monthly Revenue:", value=f"{totals['mrr']:.2f}€", inline=True)
+        embed.add_field(name="Suspended:", value=str(totals["suspended"]), inline=True)
+
+        overdue_lines = []
+        for bound, label in ((0, "< 1 day"), (1, "1-6 days"), (7, "7 days"), (8, "> 7 days")):
+            bucket = overdue.get(bound, {})
+            overdue_lines.append(f"**{label}:** {bucket.get('count', 0)} ({bucket.get('amount', 0):.2f}€)")
+        embed.add_field(name=f"Overdue ({totals['overdue']}):", value="\n".join(overdue_lines), inline=False)
+
+        interval_lines = [
+            f"**{row['_id']} month(s):** {row['count']} | {row['revenue']:.2f}€ per interval | {row['mrr']:.2f}€ per month"
+            for row in stats["intervals"]
+        ]
+        embed.add_field(name="Per Interval:", value="\n".join(interval_lines) or "N/A", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
-            lines.append(
-                f"**{index}** | ** **User:** <@{user_id}> | **Last Paid:** {last_paid} | **Next Payment:** {next_payment} | **Interval:** {interval} month(s)"
-            )
+    @app_commands.command(
+        name="import-subscriptions",
+        description="Import subscriptions from a CSV or JSONL file (user_id, price, interval, last_paid, email)."
+    )
+    @app_commands.describe(
+        file="CSV with a header row or JSONL file; existing subscriptions are overwritten.",
+        notify="Send the subscription welcome message to every imported user."
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def bulk_import(self, interaction: discord.Interaction, file: discord.Attachment,
+                          notify: bool = False) -> None:
+        fmt = "jsonl" if file.filename.lower().endswith((".jsonl", ".json")) else "csv"
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+        except Exception as e:
+            logger.error(f"Failed to read subscription import {file.filename}: {e}")
+            return await interaction.followup.send("Could not read the attached file.", ephemeral=True)
+
+        imported, errors = await import_subscriptions(self.subscriptions, read_rows(text, fmt))
+        for doc in imported:
+            subscription_scheduler.track(doc["_id"], doc["next_payment"])
+        subscription_stats.invalidate()
+
+        message = f"Imported {len(imported)} subscriptions. Failed rows: {len(errors)}."
+        if notify:
+            welcome = [
+                (user, {"content": build_welcome_message(doc["interval"], doc["next_payment"])})
+                for doc in imported
+                if (user := self.client.get_user(doc["_id"])) is not None
+            ]
+            sent, failed = await self.dispatcher.send_dms(welcome)
+            message += f" Welcome messages sent: {sent}, failed: {failed + len(imported) - len(welcome)}."
+
+        files = []
+        if errors:
+            report = "\n".join(f"Row {row_number}: {error}" for row_number, error in errors)
+            files.append(discord.File(io.BytesIO(report.encode("utf-8")), filename="import-errors.txt"))
+        await interaction.followup.send(message, files=files, ephemeral=True)
 
-        full_description = "\n".join(lines)
-        # Split the long description into multiple embeds, if necessary
-        embeds = create_embeds(full_description, title="Subscriptions List")
+    @app_commands.command(
+        name="export-subscriptions",
+        description="Export all subscriptions as a CSV or JSONL file."
+    )
+    @app_commands.rename(file_format="format")
+    @app_commands.choices(file_format=[
+        Choice(name="CSV", value="csv"),
+        Choice(name="JSONL", value="jsonl")
+    ])
+    @app_commands.checks.has_permissions(administrator=True)
+    async def bulk_export(self, interaction: discord.Interaction, file_format: Choice[str] = None) -> None:
+        fmt = file_format.value if file_format else "csv"
+        await interaction.response.defer(ephemeral=True, thinking=True)
 
-        # Send the first embed as the initial response, then follow up with the rest if there are any
-        await interaction.response.send_message(embed=embeds[0], ephemeral=True)
-        if len(embeds) > 1:
-            for embed in embeds[1:]:
-                await interaction.followup.send(embed=embed, ephemeral=True)
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}")
+        os.close(fd)
+        try:
+            count = await export_subscriptions(self.subscriptions, fmt, path)
+            file = discord.File(path, filename=f"subscriptions-{datetime.now().strftime('%Y-%m-%d')}.{fmt}")
+            await interaction.followup.send(f"Exported {count} subscriptions.", file=file, ephemeral=True)
+        except Exception as e:
+            logger.error(f"Failed to export subscriptions: {e}")
+            await interaction.followup.send("Failed to export subscriptions.", ephemeral=True)
+        finally:
+            os.remove(path)
 
 
 async def setup(client: commands.Bot) -> None:
@@ -4,8 +4,12 @@ import discord
 from discord.ext import commands
 
 from utils.database import mongodb
+from utils.github import GithubAPI
+from utils.jobs import ServerActionQueue
 from utils.logger import logger
 from utils.config import Config
+from utils.pterodactyl import PterodactylAPI
+from utils.webhook import PushWebhook
 
 
 class Bot(commands.Bot):
@@ -24,14 +28,61 @@ class Bot(commands.Bot):
         self.logger = logger
         self.config = Config()
         self.synced = False
+        self.pterodactyl = None
+        self.github = None
+        self.webhook = None
+        self.server_actions = None
 
     async def setup_hook(self):
         await mongodb.connect()
+        # One pooled panel client for the whole process, closed again in close().
+        cache_collection = mongodb.get_database("ByteScrape")["pterodactyl_cache"]
+        self.pterodactyl = await PterodactylAPI(cache_collection=cache_collection).start()
+        self.server_actions = ServerActionQueue(
+            mongodb.get_database("ByteScrape")["server_actions"],
+            handler=self.pterodactyl.apply_action
+        )
+        if self.config.pterodactyl_enabled:
+            self.pterodactyl.directory.start()
+            await self.server_actions.start()
+        else:
+            # Without a panel, jobs are still recorded and run once a panel is configured.
+            await self.server_actions.ensure_indexes()
+            self.logger.warning("No Pterodactyl panel configured, server actions are queued but not run")
+        self.github = await GithubAPI().start()
+        self.github.catalogue.refresh_later()
+
+    async def start_webhook(self):
+        # Pushes are handed to the Github cog as a `repo_push` event, so the cogs must be loaded first.
+        if self.webhook is not None or not self.config.github_webhook_secret:
+            return
+        self.webhook = PushWebhook(
+            lambda repo: self.dispatch("repo_push", repo),
+            secret=self.config.github_webhook_secret,
+            host=self.config.github_webhook_host,
+            port=self.config.github_webhook_port
+        )
+        try:
+            await self.webhook.start()
+        except OSError as e:
+            self.logger.error(f"Could not start the GitHub webhook receiver: {e}")
+            self.webhook = None
 
+    async def close(self):
+        if self.webhook is not None:
+            await self.webhook.stop()
+        if self.server_actions is not None:
+            self.server_actions.stop()
+        if self.pterodactyl is not None:
+            await self.pterodactyl.close()
+        if self.github is not None:
+            await self.github.close()
+        await super().close()
 
     async def on_ready(self):
         await self.wait_until_ready()
         await self.load_cogs()
+        await self.start_webhook()
         await self.change_presence(
             activity=discord.Game(name=self.config.activity),
             status=self.get_status()
@@ -33,9 +33,16 @@ class Config:
         self.github_organisation = self.config["github"]["organisation"]
         self.github_username = self.config["github"]["username"]
         self.github_token = self.config["github"]["token"]
+        webhook = self.config["github"].get("webhook", {})
+        self.github_webhook_secret = webhook.get("secret")
+        self.github_webhook_host = webhook.get("host", "0.0.0.0")
+        self.github_webhook_port = webhook.get("port", 8090)
 
         self.pterodactyl_token = self.config["pterodactyl"]["token"]
         self.pterodactyl_url = self.config["pterodactyl"]["url"]
+        # The panel is optional, the sample config's placeholders leave it disabled.
+        self.pterodactyl_enabled = bool(self.pterodactyl_token) and \
+            self.pterodactyl_url.strip().startswith(("http://", "https://"))
 
         self.save_logs = self.config["logging"]["save"]
         self.destination_logs = self.config["logging"]["destination"]
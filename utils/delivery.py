@@ -0,0 +1,174 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import shutil
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import discord
+
+from utils.logger import logger
+from utils.repo_store import hash_file
+
+LICENCE_TEMPLATE = (
+    "This copy of {repo} is licensed to {buyer_name} (Discord ID {buyer_id}).\n"
+    "Licence ID: {licence_id}\n"
+    "Issued: {issued}\n"
+    "\n"
+    "It is for the licensee's own use only. Redistribution or resale is not permitted.\n"
+)
+
+
+class ProductUploads:
+    def __init__(self, collection):
+        """
+        Records the message holding the first upload of every product archive, keyed by the archive's
+        SHA-256, so later sales forward that message instead of uploading the archive again.
+        :param collection: Mongo collection holding the uploads.
+        """
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("repo")
+
+    async def get(self, sha256: str):
+        return await self.collection.find_one({"_id": sha256})
+
+    async def record(self, sha256: str, repo: str, message: discord.Message) -> None:
+        # Older archives of the product are never delivered again, only the current one is kept.
+        await self.collection.delete_many({"repo": repo, "_id": {"$ne": sha256}})
+        await self.collection.replace_one(
+            {"_id": sha256},
+            {
+                "repo": repo,
+                "channel_id": message.channel.id,
+                "message_id": message.id,
+                "created_at": datetime.now(),
+            },
+            upsert=True
+        )
+
+    async def invalidate(self, sha256: str) -> None:
+        await self.collection.delete_one({"_id": sha256})
+
+    async def forward(self, client: discord.Client, sha256: str, destination) -> bool:
+        """
+        Deliver a product by forwarding the message of its earlier upload.
+        :return: False if there is no usable earlier upload, the caller then uploads the archive.
+        """
+        upload = await self.get(sha256)
+        if upload is None:
+            return False
+        channel = client.get_channel(upload["channel_id"])
+        if channel is None:
+            await self.invalidate(sha256)
+            return False
+        try:
+            await channel.get_partial_message(upload["message_id"]).forward(destination)
+        except discord.HTTPException as e:
+            # The upload's message or channel is gone (e.g. a closed ticket), upload again.
+            logger.warning(f"Could not forward the upload of {upload['repo']}, uploading it again: {e}")
+            await self.invalidate(sha256)
+            return False
+        return True
+
+
+def licence_id(sha256: str, buyer_id: int) -> str:
+    return hashlib.sha256(f"{sha256}:{buyer_id}".encode()).hexdigest()[:16]
+
+
+def personalise_archive(source: str, target: str, repo: str, sha256: str, buyer_id: int, buyer_name: str) -> str:
+    """
+    Build a buyer's copy of a product archive; runs in a worker process.
+    The source is copied byte for byte and the licence entry appended in place of the central directory,
+    so existing entries are never decompressed or recompressed. The archive comment is stamped with the
+    licence ID as a watermark.
+    :return: SHA-256 of the buyer's copy.
+    """
+    temp_target = f"{target}.part"
+    shutil.copyfile(source, temp_target)
+    try:
+        identifier = licence_id(sha256, buyer_id)
+        with zipfile.ZipFile(temp_target, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            names = archive.namelist()
+            # GitHub zipballs hold a single top-level folder, the licence goes next to the sources.
+            top = names[0].split("/", 1)[0] + "/" if names and "/" in names[0] else ""
+            if not all(name.startswith(top) for name in names):
+                top = ""
+            archive.writestr(f"{top}LICENCE-{identifier}.txt", LICENCE_TEMPLATE.format(
+                repo=repo, buyer_name=buyer_name, buyer_id=buyer_id, licence_id=identifier,
+                issued=datetime.now().strftime("%Y-%m-%d")
+            ))
+            comment = archive.comment.decode("ascii", "ignore")
+            archive.comment = f"{comment}\nlicence:{identifier}".strip().encode()
+
+        sha256 = hash_file(temp_target)
+        os.replace(temp_target, target)
+        return sha256
+    finally:
+        if os.path.exists(temp_target):
+            os.remove(temp_target)
+
+
+class ArchivePersonaliser:
+    def __init__(self, directory: str = "./deliveries", workers: int = 2):
+        """
+        Builds per-buyer copies of product archives in a process pool, so zip work never runs on the
+        event loop. Copies are cached on disk by (archive hash, buyer).
+        :param directory: Folder holding the buyers' copies, one subfolder per product.
+        :param workers: Number of worker processes.
+        """
+        self.directory = directory
+        self.workers = workers
+        self.executor = None
+        self._building = {}
+        self._hashes = {}
+
+    def path(self, repo: str, sha256: str, buyer_id: int) -> str:
+        return os.path.join(self.directory, repo, f"{buyer_id}-{sha256[:16]}.zip")
+
+    async def build(self, repo: str, source: str, sha256: str, buyer_id: int, buyer_name: str) -> tuple[str, str]:
+        """
+        Get the buyer's copy of a product, building it unless it is cached. Concurrent requests
+        for the same copy share one build.
+        :param source: Path of the product archive.
+        :param sha256: SHA-256 of the product archive.
+        :return: Tuple of (path, SHA-256) of the buyer's copy.
+        """
+        target = self.path(repo, sha256, buyer_id)
+        building = self._building.get(target)
+        if building is None and os.path.exists(target):
+            if target not in self._hashes:
+                self._hashes[target] = await asyncio.to_thread(hash_file, target)
+            return target, self._hashes[target]
+
+        if building is None:
+            if self.executor is None:
+                # Spawn the workers, forking a process that runs the event loop and driver threads can deadlock them.
+                self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context("spawn"))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            building = asyncio.get_running_loop().run_in_executor(
+                self.executor, personalise_archive, source, target, repo, sha256, buyer_id, buyer_name
+            )
+            self._building[target] = building
+            building.add_done_callback(lambda _: self._building.pop(target, None))
+        self._hashes[target] = await asyncio.shield(building)
+        await asyncio.to_thread(self._prune, buyer_id, target)
+        return target, self._hashes[target]
+
+    def _prune(self, buyer_id: int, keep: str) -> None:
+        # Copies built from older archives of the product are never delivered again.
+        folder = os.path.dirname(keep)
+        for filename in os.listdir(folder):
+            path = os.path.join(folder, filename)
+            if filename.startswith(f"{buyer_id}-") and filename.endswith(".zip") and path != keep:
+                os.remove(path)
+                self._hashes.pop(path, None)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,144 @@
+import asyncio
+import random
+
+from utils.embed import EMBEDS_PER_MESSAGE, MESSAGE_CHARACTER_LIMIT
+from utils.logger import logger
+
+
+def batch_embeds(embeds: list) -> list[list]:
+    """
+    Group embeds into as few messages as Discord's per-message limits allow.
+    :param embeds: Embeds in delivery order.
+    :return: List of embed lists, one per message.
+    """
+    batches = []
+    current = []
+    size = 0
+    for embed in embeds:
+        length = len(embed)
+        if current and (len(current) == EMBEDS_PER_MESSAGE or size + length > MESSAGE_CHARACTER_LIMIT):
+            batches.append(current)
+            current = []
+            size = 0
+        current.append(embed)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (OSError, asyncio.TimeoutError))
+
+
+class RouteBucket:
+    def __init__(self, rate: int, per: float, concurrency: int, retries: int = 4, base_delay: float = 1.0):
+        """
+        Paces the sends of a single Discord route and retries transient failures.
+        :param rate: Number of requests allowed per `per` seconds.
+        :param per: Length of the rate window in seconds.
+        :param concurrency: Number of sends in flight at once.
+        :param retries: Retries per send after the first attempt.
+        :param base_delay: First backoff delay in seconds, doubled on every retry.
+        """
+        self.interval = per / rate
+        self.concurrency = concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self._next_slot = 0.0
+
+    async def _wait_for_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        slot = max(self._next_slot, now)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def pause(self, delay: float) -> None:
+        """
+        Hold back every send on this route, used when Discord answers with a 429.
+        """
+        resume = asyncio.get_running_loop().time() + delay
+        self._next_slot = max(self._next_slot, resume)
+
+    async def run(self, send):
+        """
+        Run a send coroutine function inside the route's pacing, retrying with jittered backoff.
+        :param send: Zero-argument coroutine function performing the request.
+        :return: Whatever the send returns.
+        """
+        attempt = 0
+        while True:
+            await self._wait_for_slot()
+            try:
+                return await send()
+            except Exception as e:
+                if attempt >= self.retries or not is_retryable(e):
+                    raise
+                retry_after = getattr(e, "retry_after", None)
+                delay = retry_after if retry_after else self.base_delay * 2 ** attempt
+                delay += random.uniform(0, delay / 2)
+                if getattr(e, "status", None) == 429:
+                    self.pause(delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+
+class ReminderDispatcher:
+    def __init__(self):
+        # DMs and the shared subscriptions channel are separate Discord routes with separate limits.
+        self.dm = RouteBucket(rate=25, per=1, concurrency=10)
+        self.channel = RouteBucket(rate=5, per=5, concurrency=1)
+
+    @staticmethod
+    async def _drain(bucket: RouteBucket, jobs: list) -> tuple[int, int]:
+        jobs = iter(jobs)
+        sent = failed = 0
+
+        async def worker():
+            nonlocal sent, failed
+            for label, send in jobs:
+                try:
+                    await bucket.run(send)
+                    sent += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to send message to {label}: {e}")
+
+        await asyncio.gather(*(worker() for _ in range(bucket.concurrency)))
+        return sent, failed
+
+    async def send_dms(self, messages: list) -> tuple[int, int]:
+        """
+        Deliver direct messages through the paced DM route.
+        :param messages: List of (user, kwargs) tuples, kwargs are passed to user.send.
+        :return: Tuple of (delivered, failed) counts.
+        """
+        jobs = [
+            (f"{user.id} | {user.name}", lambda user=user, kwargs=kwargs: user.send(**kwargs))
+            for user, kwargs in messages
+        ]
+        return await self._drain(self.dm, jobs)
+
+    async def dispatch(self, channel, reminders: list, view=None) -> tuple[int, int]:
+        """
+        Deliver reminders as DMs and coalesced copies in the subscriptions channel.
+        :param channel: Subscriptions channel for the admin copies, or None to skip them.
+        :param reminders: List of (user, embed) tuples, each embed is shared by its DM and its channel copy.
+        :param view: View attached to every DM.
+        :return: Tuple of (delivered, failed) DM counts.
+        """
+        routes = [self.send_dms([(user, {"embed": embed, "view": view}) for user, embed in reminders])]
+        if channel is not None:
+            copy_jobs = [
+                (f"channel {channel.id}", lambda batch=batch: channel.send(embeds=batch))
+                for batch in batch_embeds([embed for _, embed in reminders])
+            ]
+            routes.append(self._drain(self.channel, copy_jobs))
+
+        results = await asyncio.gather(*routes)
+        return results[0]
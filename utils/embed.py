@@ -18,3 +18,95 @@ def create_embed(color=config.color, timestamp:bool=config.timestamp, **kwargs):
         embed.timestamp = datetime.now()
     embed.set_footer(text=config.footer_text, icon_url=config.footer_icon)
     return embed
+
+
+# Discord's embed limits.
+DESCRIPTION_LIMIT = 4096
+EMBEDS_PER_MESSAGE = 10
+MESSAGE_CHARACTER_LIMIT = 6000
+
+
+def _line_pieces(line: str, limit: int):
+    # Lines longer than one description are cut into description-sized pieces.
+    if len(line) <= limit:
+        yield line
+        return
+    for start in range(0, len(line), limit):
+        yield line[start:start + limit]
+
+
+def pack_lines(lines, first_reserved: int = 0, reserved: int = 0):
+    """
+    Split lines into embed descriptions and group them into messages, in a single pass.
+    :param lines: Iterable of lines, consumed lazily.
+    :param first_reserved: Characters reserved in the first message (e.g. the title).
+    :param reserved: Characters reserved in every message (e.g. the footer).
+    :return: Generator of messages, each a list of descriptions.
+    """
+    message = []
+    budget = MESSAGE_CHARACTER_LIMIT - reserved - first_reserved
+    buffer = []
+    size = 0
+
+    for line in lines:
+        for piece in _line_pieces(line, DESCRIPTION_LIMIT):
+            added = len(piece) + 1 if buffer else len(piece)
+            if size + added <= min(DESCRIPTION_LIMIT, budget):
+                buffer.append(piece)
+                size += added
+                continue
+
+            if buffer:
+                message.append("\n".join(buffer))
+                budget -= size
+            if message and (len(message) == EMBEDS_PER_MESSAGE or len(piece) > min(DESCRIPTION_LIMIT, budget)):
+                yield message
+                message = []
+                budget = MESSAGE_CHARACTER_LIMIT - reserved
+            buffer = [piece]
+            size = len(piece)
+
+    if buffer:
+        message.append("\n".join(buffer))
+    if message:
+        yield message
+
+
+def create_embeds(lines, title: str = None, color=config.color):
+    """
+    Stream embeds for an arbitrarily long list, packed into as few messages as Discord allows.
+    The first embed carries the title, the last one the footer and timestamp.
+    :param lines: Iterable of lines or a single string.
+    :param title: Title of the first embed.
+    :param color: Embed color, defaults to the configured one.
+    :return: Generator of messages, each a list of embeds.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+    cl = int(config.color, 16) if color == config.color else color
+
+    previous = None
+    for index, descriptions in enumerate(pack_lines(lines, len(title or ""), len(config.footer_text or ""))):
+        embeds = [discord.Embed(color=cl, description=description) for description in descriptions]
+        if index == 0:
+            embeds[0].title = title
+        if previous is not None:
+            yield previous
+        previous = embeds
+
+    if previous is not None:
+        if config.timestamp:
+            previous[-1].timestamp = datetime.now()
+        previous[-1].set_footer(text=config.footer_text, icon_url=config.footer_icon)
+        yield previous
+
+
+async def send_embeds(interaction: discord.Interaction, messages, ephemeral: bool = False) -> None:
+    """
+    Send the messages produced by create_embeds as the response and its followups.
+    """
+    for embeds in messages:
+        if interaction.response.is_done():
+            await interaction.followup.send(embeds=embeds, ephemeral=ephemeral)
+        else:
+            await interaction.response.send_message(embeds=embeds, ephemeral=ephemeral)
@@ -0,0 +1,359 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+import aiofiles
+import aiohttp
+
+from utils.config import Config
+from utils.logger import logger
+
+config = Config()
+
+API_URL = "https://api.github.com"
+
+# Request priorities: interactive requests (commands, autocomplete) may spend the whole budget,
+# bulk work (repository pulls) stops at the reserve.
+INTERACTIVE = 0
+BULK = 1
+
+
+def next_link(header: str):
+    """
+    Extract the `rel="next"` URL from a GitHub Link header.
+    :return: URL of the next page, or None on the last page.
+    """
+    if not header:
+        return None
+    for part in header.split(","):
+        url, _, params = part.partition(";")
+        if 'rel="next"' in params:
+            return url.strip().strip("<>")
+    return None
+
+
+class RateLimitExceeded(Exception):
+    """
+    Raised when a request is shed because the GitHub rate limit budget is exhausted.
+    """
+
+
+class RateBudget:
+    def __init__(self, reserve: int = 100, max_wait: float = 15 * 60):
+        """
+        Remaining GitHub request budget, read from the X-RateLimit-* headers of every response.
+        :param reserve: Requests kept for interactive use; bulk requests wait for the reset below it.
+        :param max_wait: Longest a bulk request waits for the reset before it is shed.
+        """
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.waiting = 0
+        self.shed = 0
+
+    def update(self, headers) -> None:
+        # Search and GraphQL have budgets of their own, only the core budget is tracked.
+        if headers.get("X-RateLimit-Resource", "core") != "core":
+            return
+        remaining = headers.get("X-RateLimit-Remaining")
+        retry_after = headers.get("Retry-After")
+        try:
+            if remaining is not None:
+                self.limit = int(headers.get("X-RateLimit-Limit", self.limit or 0))
+                self.remaining = int(remaining)
+                self.reset = float(headers.get("X-RateLimit-Reset", self.reset or 0))
+            if retry_after is not None:
+                # Secondary rate limit, nothing may be sent until it is over.
+                self.remaining = 0
+                self.reset = max(self.reset or 0, time.time() + float(retry_after))
+        except ValueError:
+            pass
+
+    def seconds_until_reset(self) -> float:
+        return max(self.reset - time.time(), 0) if self.reset else 0
+
+    def _available(self, priority: int) -> bool:
+        if self.remaining is None:
+            return True
+        if self.seconds_until_reset() == 0:
+            # The window rolled over, the next response reports the new budget.
+            self.remaining = None
+            return True
+        return self.remaining > (0 if priority == INTERACTIVE else self.reserve)
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        """
+        Take one request from the budget. Bulk requests below the reserve wait for the reset.
+        :raises RateLimitExceeded: For interactive requests on an empty budget, or bulk requests
+                                   whose wait would exceed max_wait.
+        """
+        while not self._available(priority):
+            wait = self.seconds_until_reset()
+            if priority == INTERACTIVE or wait > self.max_wait:
+                self.shed += 1
+                raise RateLimitExceeded(f"GitHub rate limit exhausted, resets in {wait:.0f}s")
+            logger.warning(f"GitHub rate limit budget at {self.remaining}, holding bulk request for {wait:.0f}s")
+            self.waiting += 1
+            try:
+                await asyncio.sleep(wait + 1)
+            finally:
+                self.waiting -= 1
+        if self.remaining is not None:
+            self.remaining -= 1
+
+
+class RepoCatalogue:
+    def __init__(self, api, ttl: float = 300, per_page: int = 100):
+        """
+        In-memory list of the organisation's repositories, following every `Link` page.
+        Pages are revalidated with their ETag, so an unchanged page costs a 304 that does not use rate limit.
+        :param api: GithubAPI used for the requests.
+        :param ttl: Seconds after which the list is revalidated.
+        :param per_page: Page size of the list requests.
+        """
+        self.api = api
+        self.ttl = ttl
+        self.per_page = per_page
+        self.repos = []
+        self.refreshed_at = None
+        self._names = []
+        self._pages = {}
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.refreshed_at is not None and time.monotonic() - self.refreshed_at < self.ttl
+
+    async def _refresh(self) -> bool:
+        url = f"{API_URL}/orgs/{self.api.organisation}/repos?per_page={self.per_page}"
+        pages = {}
+        changed = False
+        while url:
+            cached = self._pages.get(url)
+            status, headers, data = await self.api.get(url, etag=cached["etag"] if cached else None)
+            if status == 304:
+                page = cached
+            else:
+                page = {"etag": headers.get("ETag"), "data": data, "next": next_link(headers.get("Link"))}
+                changed = True
+            pages[url] = page
+            url = page["next"]
+
+        changed = changed or pages.keys() != self._pages.keys()
+        self._pages = pages
+        if changed:
+            self.repos = [repo for page in pages.values() for repo in page["data"]]
+            self._names = [(repo["name"].lower(), repo["name"]) for repo in self.repos]
+        self.refreshed_at = time.monotonic()
+        logger.debug(f"Refreshed repository catalogue: {len(self.repos)} repositories, changed: {changed}")
+        return changed
+
+    async def refresh(self) -> bool:
+        """
+        Revalidate every page of the organisation's repository list.
+        :return: True if any page changed.
+        """
+        async with self._lock:
+            return await self._refresh()
+
+    async def get(self) -> list:
+        """
+        :return: Every repository of the organisation, revalidated first if older than the TTL.
+                 A failed revalidation falls back to the last known list.
+        """
+        async with self._lock:
+            if not self.fresh:
+                try:
+                    await self._refresh()
+                except (aiohttp.ClientError, asyncio.TimeoutError, RateLimitExceeded) as e:
+                    if self.refreshed_at is None:
+                        raise
+                    logger.warning(f"Failed to refresh repository catalogue, serving the cached list: {e}")
+        return self.repos
+
+    def refresh_later(self) -> None:
+        """
+        Revalidate in the background unless a refresh is already running.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_quietly())
+
+    async def _refresh_quietly(self) -> None:
+        try:
+            await self.get()
+        except Exception as e:
+            logger.error(f"Failed to refresh repository catalogue: {e}")
+
+    def search(self, current: str, limit: int = 25) -> list[str]:
+        """
+        Match repository names from memory, prefix matches first. A stale catalogue is answered
+        as is and revalidated in the background, so callers never wait on GitHub.
+        :param current: Text typed so far.
+        :param limit: Maximum number of names returned.
+        """
+        if not self.fresh:
+            self.refresh_later()
+        current = current.lower()
+        prefix = []
+        contains = []
+        for lower, name in self._names:
+            if lower.startswith(current):
+                prefix.append(name)
+                if len(prefix) >= limit:
+                    break
+            elif current in lower and len(contains) < limit:
+                contains.append(name)
+        return (prefix + contains)[:limit]
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+class RepoManifest:
+    def __init__(self, path: str = "./repositories/manifest.json"):
+        """
+        Record of the archive pulled for every repository (pushed_at, head SHA, SHA-256 and size),
+        used to only pull repositories that changed since their last pull.
+        :param path: JSON file holding the manifest, next to the archives.
+        """
+        self.path = path
+        self.entries = {}
+        self._lock = asyncio.Lock()
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as manifest_file:
+                self.entries = json.load(manifest_file)
+        except FileNotFoundError:
+            self.entries = {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable repository manifest {self.path}: {e}")
+            self.entries = {}
+
+    def archive_path(self, repo_name: str) -> str:
+        return os.path.join(os.path.dirname(self.path), f"{repo_name}.zip")
+
+    def is_current(self, repo: dict) -> bool:
+        """
+        :param repo: Repository record from the catalogue.
+        :return: True if the local archive was pulled at the repository's current `pushed_at` and is still intact.
+        """
+        entry = self.entries.get(repo["name"])
+        if entry is None or entry.get("pushed_at") is None or entry["pushed_at"] != repo.get("pushed_at"):
+            return False
+        try:
+            return os.path.getsize(self.archive_path(repo["name"])) == entry["size"]
+        except OSError:
+            return False
+
+    def stale(self, repos: list) -> list:
+        """
+        :return: The repositories whose local archive is missing or older than their last push.
+        """
+        return [repo for repo in repos if not self.is_current(repo)]
+
+    async def record(self, repo_name: str, **entry) -> None:
+        self.entries[repo_name] = entry
+        await self.save()
+
+    async def remove(self, repo_name: str) -> None:
+        if self.entries.pop(repo_name, None) is not None:
+            await self.save()
+
+    async def save(self) -> None:
+        async with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temp_path = f"{self.path}.part"
+            async with aiofiles.open(temp_path, "w", encoding="utf-8") as manifest_file:
+                await manifest_file.write(json.dumps(self.entries, indent=2))
+            os.replace(temp_path, self.path)
+
+
+class GithubAPI:
+    def __init__(self, timeout: float = 15, organisation: str = None, token: str = None, reserve: int = 100):
+        """
+        Pooled GitHub REST client through which every GitHub request of the bot goes, so they share
+        one rate limit budget; open it with start() (or `async with`) and release it with close().
+        :param timeout: Total timeout of a single request in seconds.
+        :param organisation: GitHub organisation holding the repositories, defaults to the config.
+        :param token: Personal access token, defaults to the config.
+        :param reserve: Requests of the budget kept for interactive use.
+        """
+        self.organisation = organisation or config.github_organisation
+        self.token = token or config.github_token
+        self.headers = {
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github+json"
+        }
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=min(5.0, timeout))
+        self.session = None
+        self.budget = RateBudget(reserve=reserve)
+        self.catalogue = RepoCatalogue(self)
+
+    async def start(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=10, ttl_dns_cache=300, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+        return self
+
+    async def close(self):
+        self.catalogue.stop()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def request(self, method: str, url: str, priority: int = INTERACTIVE, **kwargs):
+        """
+        Send a request within the rate limit budget and yield the response.
+        :param url: Absolute URL, or a path starting with a slash (e.g., /orgs/{org}/repos).
+        :param priority: INTERACTIVE or BULK.
+        :param kwargs: Passed to aiohttp's request (params, headers, timeout...).
+        :raises RateLimitExceeded: If the budget has no room for the request, or GitHub answers with a rate limit.
+        """
+        if url.startswith("/"):
+            url = f"{API_URL}{url}"
+        await self.budget.acquire(priority)
+        async with self.session.request(method, url, **kwargs) as response:
+            # Redirected requests (zipballs) report the budget on the API's redirect response.
+            for hop in (*response.history, response):
+                self.budget.update(hop.headers)
+            if response.status == 429 or (response.status == 403 and self.budget.remaining == 0):
+                raise RateLimitExceeded(
+                    f"GitHub rate limit hit, resets in {self.budget.seconds_until_reset():.0f}s"
+                )
+            yield response
+
+    async def get(self, url: str, params: dict = None, etag: str = None, priority: int = INTERACTIVE) -> tuple:
+        """
+        GET an API URL.
+        :param url: Absolute URL, or a path starting with a slash (e.g., /orgs/{org}/repos).
+        :param params: Optional dictionary for query parameters.
+        :param etag: ETag of a cached copy, sent as If-None-Match.
+        :param priority: INTERACTIVE or BULK.
+        :raises aiohttp.ClientResponseError: For error statuses.
+        :return: Tuple of (status, headers, parsed JSON or None for a 304).
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        async with self.request("GET", url, priority, params=params, headers=headers) as response:
+            if response.status == 304:
+                return 304, response.headers, None
+            response.raise_for_status()
+            return response.status, response.headers, await response.json()
+
+
+repo_manifest = RepoManifest()
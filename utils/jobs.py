@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from utils.logger import logger
+
+OPPOSITE_ACTIONS = {"suspend": "unsuspend", "unsuspend": "suspend"}
+
+
+class ServerActionQueue:
+    def __init__(self, collection, handler, workers: int = 4, visibility_timeout: float = 300,
+                 max_attempts: int = 5, poll_interval: float = 30):
+        """
+        Durable outbox of suspend/unsuspend jobs, claimed atomically by a bounded pool of workers.
+        Jobs survive restarts; a job whose worker died becomes claimable again once its lease expires.
+        :param collection: Mongo collection holding the jobs.
+        :param handler: Coroutine function (email, action) -> PanelResult.
+        :param workers: Number of concurrent workers.
+        :param visibility_timeout: Seconds a claimed job stays invisible to other workers.
+        :param max_attempts: Attempts before a job is dead-lettered.
+        :param poll_interval: Seconds an idle worker waits before looking for due retries.
+        """
+        self.collection = collection
+        self.handler = handler
+        self.workers = workers
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    async def ensure_indexes(self) -> None:
+        # At most one active job per (email, action); finished jobs expire after a week.
+        await self.collection.create_index(
+            [("email", 1), ("action", 1)],
+            name="active_job",
+            unique=True,
+            partialFilterExpression={"active": True}
+        )
+        await self.collection.create_index([("active", 1), ("visible_at", 1)], name="claimable")
+        await self.collection.create_index("blocked_by", sparse=True)
+        await self.collection.create_index("finished_at", expireAfterSeconds=7 * 24 * 60 * 60)
+
+    async def enqueue(self, email: str, action: str, user_id: int = None) -> bool:
+        """
+        Queue a server action, superseding an active opposite action for the same email. If the opposite
+        action is already running, the new job waits until that run has finished, so it always lands last.
+        :return: False if the same action is already queued for this email.
+        """
+        now = datetime.now()
+        opposite = {"email": email, "action": OPPOSITE_ACTIONS[action], "active": True}
+        running = await self.collection.find_one(
+            {**opposite, "status": "running", "visible_at": {"$gt": now}}, {"visible_at": 1}
+        )
+        await self.collection.update_many(
+            {**opposite, "status": {"$in": ["pending", "running"]}},
+            {"$set": {"status": "cancelled", "active": False, "finished_at": now}}
+        )
+        job = {
+            "email": email,
+            "action": action,
+            "user_id": user_id,
+            "status": "pending",
+            "active": True,
+            "attempts": 0,
+            "visible_at": now,
+            "created_at": now,
+        }
+        if running is not None:
+            # Visible once the superseded run reports back, or when its lease expires if its worker died.
+            job["visible_at"] = running["visible_at"]
+            job["blocked_by"] = running["_id"]
+        try:
+            await self.collection.insert_one(job)
+        except DuplicateKeyError:
+            return False
+        if running is not None and await self.collection.find_one({"_id": running["_id"], "handled_at": {"$exists": True}}):
+            await self._release(running["_id"])
+        self._wakeup.set()
+        return True
+
+    async def _release(self, job_id) -> None:
+        """
+        Make the jobs waiting for a superseded run claimable right away.
+        """
+        result = await self.collection.update_many(
+            {"blocked_by": job_id, "active": True, "status": "pending"},
+            {"$set": {"visible_at": datetime.now()}, "$unset": {"blocked_by": ""}}
+        )
+        if result.modified_count:
+            self._wakeup.set()
+
+    async def _claim(self):
+        now = datetime.now()
+        return await self.collection.find_one_and_update(
+            {"active": True, "visible_at": {"$lte": now}},
+            {"$set": {"status": "running", "visible_at": now + timedelta(seconds=self.visibility_timeout)},
+             "$unset": {"handled_at": ""},
+             "$inc": {"attempts": 1}},
+            sort=[("visible_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _finish(self, job: dict, update: dict) -> None:
+        # Guard on the lease, a worker whose lease expired must not overwrite the new owner's outcome,
+        # and on `active`, a job superseded while running must neither complete nor be retried.
+        await self.collection.update_one(
+            {"_id": job["_id"], "visible_at": job["visible_at"], "active": True, "status": "running"},
+            {"$set": update}
+        )
+
+    async def _process(self, job: dict) -> None:
+        email, action = job["email"], job["action"]
+        try:
+            result = await self.handler(email, action)
+            ok, error = result.ok, result.error
+        except Exception as e:
+            ok, error = False, str(e)
+
+        now = datetime.now()
+        # Record that this run is over before releasing the jobs that superseded it, see enqueue.
+        await self.collection.update_one({"_id": job["_id"]}, {"$set": {"handled_at": now}})
+        await self._release(job["_id"])
+        if ok:
+            await self._finish(job, {"status": "done", "active": False, "finished_at": now})
+        elif job["attempts"] >= self.max_attempts:
+            logger.error(f"Dead-lettered {action} job for {email} after {job['attempts']} attempts: {error}")
+            await self._finish(job, {"status": "dead", "active": False, "finished_at": now, "last_error": error})
+        else:
+            delay = min(30 * 2 ** (job["attempts"] - 1), self.visibility_timeout)
+            logger.warning(f"{action} job for {email} failed ({error}), retrying in {delay}s")
+            await self._finish(job, {"status": "pending", "visible_at": now + timedelta(seconds=delay),
+                                     "last_error": error})
+
+    async def _worker(self) -> None:
+        while True:
+            # Clear before claiming, an enqueue between an empty claim and the wait must still wake the worker.
+            self._wakeup.clear()
+            try:
+                job = await self._claim()
+            except Exception as e:
+                logger.error(f"Failed to claim server action job: {e}")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._process(job)
+            except Exception as e:
+                # The job's lease makes it claimable again once it expires, the worker just carries on.
+                logger.error(f"Failed to process {job['action']} job for {job['email']}: {e}")
+
+    async def start(self) -> None:
+        await self.ensure_indexes()
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
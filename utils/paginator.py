@@ -0,0 +1,94 @@
+import discord
+from discord import ButtonStyle
+from discord.ui import View
+
+
+def keyset_filter(sort: list[tuple[str, int]], anchor: tuple, forward: bool) -> dict:
+    """
+    Build a range filter selecting the documents after (or before) an anchor row in sort order.
+    :param sort: Sort specification, the last key must be unique (usually _id).
+    :param anchor: Values of the sort keys of the anchor row.
+    :param forward: True for rows after the anchor, False for rows before it.
+    :return: MongoDB filter.
+    """
+    clauses = []
+    for index, (field, direction) in enumerate(sort):
+        operator = "$gt" if (direction == 1) == forward else "$lt"
+        clause = {key: anchor[position] for position, (key, _) in enumerate(sort[:index])}
+        clause[field] = {operator: anchor[index]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+class CursorPaginator(View):
+    def __init__(self, collection, query: dict, sort: list[tuple[str, int]], render, page_size: int = 15):
+        """
+        Prev/Next paginator over a MongoDB range cursor; only the visible page is ever fetched.
+        :param collection: Motor collection to page through.
+        :param query: Filter applied to every page.
+        :param sort: Sort specification, the last key must be unique (usually _id).
+        :param render: Callable (documents, offset, page) -> discord.Embed.
+        :param page_size: Rows per page.
+        """
+        super().__init__(timeout=600)
+        self.collection = collection
+        self.query = query
+        self.sort = sort
+        self.render = render
+        self.page_size = page_size
+        self.page = 0
+        self.first = None
+        self.last = None
+
+    def _key(self, document: dict) -> tuple:
+        return tuple(document.get(field) for field, _ in self.sort)
+
+    async def _fetch(self, anchor: tuple = None, forward: bool = True) -> tuple[list, bool]:
+        query = self.query
+        if anchor is not None:
+            query = {"$and": [self.query, keyset_filter(self.sort, anchor, forward)]}
+        sort = self.sort if forward else [(field, -direction) for field, direction in self.sort]
+        documents = await self.collection.find(query).sort(sort).limit(self.page_size + 1).to_list(length=None)
+        more = len(documents) > self.page_size
+        documents = documents[:self.page_size]
+        if not forward:
+            documents.reverse()
+        return documents, more
+
+    async def load(self, forward: bool = True):
+        """
+        Fetch the first page, or the page after/before the current one.
+        :return: Rendered embed, or None if the page is empty.
+        """
+        anchor = None
+        if self.page:
+            anchor = self.last if forward else self.first
+        documents, more = await self._fetch(anchor, forward)
+        if not documents:
+            # The rows were removed since the current page was rendered.
+            button = self.next if forward else self.previous
+            button.disabled = True
+            return None
+
+        self.page = self.page + 1 if forward else self.page - 1
+        self.first = self._key(documents[0])
+        self.last = self._key(documents[-1])
+        self.previous.disabled = self.page <= 1 or (not forward and not more)
+        self.next.disabled = forward and not more
+        return self.render(documents, (self.page - 1) * self.page_size, self.page)
+
+    @discord.ui.button(label="Prev", style=ButtonStyle.grey, disabled=True)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        embed = await self.load(forward=False)
+        if embed is None:
+            await interaction.response.edit_message(view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Next", style=ButtonStyle.grey)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button) -> None:
+        embed = await self.load(forward=True)
+        if embed is None:
+            await interaction.response.edit_message(view=self)
+        else:
+            await interaction.response.edit_message(embed=embed, view=self)
@@ -1,56 +1,424 @@
 import aiohttp
+import argparse
 import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from utils.cache import TTLCache
 from utils.config import Config
 from utils.logger import logger
 
 config = Config()
 
 
+def is_suspended(server: dict) -> bool:
+    """
+    Read a server's suspension state from its attributes (`suspended` on current panels, `status` on older ones).
+    """
+    if "suspended" in server:
+        return bool(server["suspended"])
+    return server.get("status") == "suspended"
+
+
+class PanelUnavailable(Exception):
+    """
+    Raised when the panel keeps failing after all retries, or while its circuit breaker is open.
+    """
+
+
+@dataclass
+class PanelResult:
+    """
+    Outcome of a suspend/unsuspend flow for one email; returned instead of raising.
+    """
+    email: str
+    action: str
+    ok: bool = False
+    servers: dict = field(default_factory=dict)
+    changed: int = 0
+    error: str = None
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60):
+        """
+        Stops requests to a panel after repeated failures, then lets a single probe through after `reset_timeout`.
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :param reset_timeout: Seconds the circuit stays open before a probe is allowed.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            # Let one probe through and keep the circuit open for everyone else until it reports back.
+            self.opened_at = time.monotonic()
+            return True
+        return state == "closed"
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ResolutionCache:
+    def __init__(self, maxsize: int = 4096, ttl: float = 6 * 60 * 60, collection=None):
+        """
+        Email -> panel user ID and server IDs, bounded in size and age with LRU eviction.
+        :param maxsize: Maximum number of emails kept in memory.
+        :param ttl: Lifetime of an entry in seconds.
+        :param collection: Optional Mongo collection persisting entries across restarts.
+        """
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.ttl = ttl
+        self.collection = collection
+
+    async def ensure_indexes(self) -> None:
+        if self.collection is not None:
+            await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, email: str):
+        """
+        :return: Dictionary with `user_id` and `servers`, or None on a miss.
+        """
+        entry = self.memory.get(email)
+        if entry is not None or self.collection is None:
+            return entry
+        now = datetime.now()
+        document = await self.collection.find_one({"_id": email, "expires_at": {"$gt": now}})
+        if document is None:
+            return None
+        entry = {"user_id": document["user_id"], "servers": document["servers"]}
+        self.memory.set(email, entry, ttl=(document["expires_at"] - now).total_seconds())
+        return entry
+
+    async def set(self, email: str, user_id: int, servers: list) -> None:
+        entry = {"user_id": user_id, "servers": servers}
+        self.memory.set(email, entry)
+        if self.collection is not None:
+            expires_at = datetime.now() + timedelta(seconds=self.ttl)
+            await self.collection.update_one(
+                {"_id": email},
+                {"$set": {"user_id": user_id, "servers": servers, "expires_at": expires_at}},
+                upsert=True
+            )
+
+    async def invalidate(self, email: str) -> None:
+        self.memory.pop(email)
+        if self.collection is not None:
+            await self.collection.delete_one({"_id": email})
+
+
+class PanelDirectory:
+    def __init__(self, api, max_age: float = 15 * 60, per_page: int = 100, concurrency: int = 4):
+        """
+        Local index of the panel's users and servers (email -> user ID -> server IDs and suspended flags),
+        built from the paginated list endpoints instead of one lookup per customer.
+        :param api: PterodactylAPI used for the list requests.
+        :param max_age: Seconds after which the index is no longer trusted for lookups.
+        :param per_page: Page size of the list requests.
+        :param concurrency: Number of pages fetched at once.
+        """
+        self.api = api
+        self.max_age = max_age
+        self.per_page = per_page
+        self.concurrency = concurrency
+        self.users = {}
+        self.emails = {}
+        self.servers = {}
+        self.synced_at = None
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.synced_at is not None and (datetime.now() - self.synced_at).total_seconds() < self.max_age
+
+    async def _pages(self, endpoint: str, params: dict):
+        """
+        Fetch every page of a list endpoint, the first one alone and the rest concurrently.
+        :return: List of all records' attributes.
+        """
+        params = {**params, "per_page": self.per_page, "page": 1}
+        first = await self.api._get(endpoint, params)
+        pages = first.get("meta", {}).get("pagination", {}).get("total_pages", 1)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(page):
+            async with semaphore:
+                return await self.api._get(endpoint, {**params, "page": page})
+
+        results = [first] + list(await asyncio.gather(*(fetch(page) for page in range(2, pages + 1))))
+        return [record["attributes"] for result in results for record in result.get("data", [])]
+
+    def _index_server(self, server: dict) -> bool:
+        known = self.servers.get(server["id"])
+        if known is not None and known["updated_at"] == server.get("updated_at"):
+            return False
+        self.servers[server["id"]] = {
+            "user": server.get("user"),
+            "suspended": is_suspended(server),
+            "updated_at": server.get("updated_at"),
+        }
+        return True
+
+    async def sync(self) -> int:
+        """
+        Refresh the index from the users (with their servers) and servers lists. Only records whose
+        `updated_at` changed are re-indexed; records missing from the panel are dropped.
+        :return: Number of changed records.
+        """
+        async with self._lock:
+            users = await self._pages("/api/application/users", {"include": "servers"})
+            servers = await self._pages("/api/application/servers", {})
+
+            changed = 0
+            seen_users = set()
+            for user in users:
+                seen_users.add(user["id"])
+                known = self.users.get(user["id"])
+                owned = [server["attributes"]["id"]
+                         for server in user.get("relationships", {}).get("servers", {}).get("data", [])]
+                if known is not None and known["updated_at"] == user.get("updated_at") and known["servers"] == owned:
+                    continue
+                if known is not None:
+                    self.emails.pop(known["email"], None)
+                email = (user.get("email") or "").lower()
+                self.users[user["id"]] = {"email": email, "servers": owned, "updated_at": user.get("updated_at")}
+                self.emails[email] = user["id"]
+                changed += 1
+
+            seen_servers = set()
+            for server in servers:
+                seen_servers.add(server["id"])
+                changed += self._index_server(server)
+
+            for user_id in set(self.users) - seen_users:
+                self.emails.pop(self.users.pop(user_id)["email"], None)
+                changed += 1
+            for server_id in set(self.servers) - seen_servers:
+                del self.servers[server_id]
+                changed += 1
+
+            self.synced_at = datetime.now()
+            logger.debug(f"Synced panel directory: {len(self.users)} users, {len(self.servers)} servers, {changed} changed")
+            return changed
+
+    def lookup(self, email: str):
+        """
+        :return: List of server IDs owned by the email, or None if the index is stale or does not know it.
+        """
+        if not self.fresh:
+            return None
+        user_id = self.emails.get(email.lower())
+        if user_id is None:
+            return None
+        return list(self.users[user_id]["servers"])
+
+    def states(self, email: str):
+        """
+        :return: Dictionary of server ID -> suspended flag (None if unknown), or None if the index
+                 is stale or does not know the email.
+        """
+        servers = self.lookup(email)
+        if servers is None:
+            return None
+        return {server_id: self.servers.get(server_id, {}).get("suspended") for server_id in servers}
+
+    def forget(self, email: str) -> None:
+        # Drop the user record too, so the next sync re-indexes the user even if it is unchanged.
+        user_id = self.emails.pop(email.lower(), None)
+        if user_id is not None:
+            self.users.pop(user_id, None)
+
+    def set_suspended(self, server_id, suspended: bool) -> None:
+        server = self.servers.get(server_id)
+        if server is not None:
+            server["suspended"] = suspended
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Failed to sync panel directory: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float = None) -> None:
+        """
+        Keep the index fresh in the background, syncing every `interval` seconds (defaults to half of max_age).
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(interval or self.max_age / 2))
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
 class PterodactylAPI:
-    def __init__(self):
+    def __init__(self, timeout: float = 15, limit_per_host: int = 50, cache_collection=None, retries: int = 3,
+                 base_delay: float = 1.0, panel_url: str = None, api_key: str = None):
         """
         Initialize with the base URL of your Pterodactyl panel and an admin API key.
-        :param panel_url: Base URL of your Pterodactyl panel (e.g., https://panel.example.com)
-        :param api_key: Application (admin) API key from your Pterodactyl panel.
+        The client keeps one pooled session; open it with start() (or `async with`) and release it with close().
+        :param timeout: Total timeout of a single request in seconds.
+        :param limit_per_host: Maximum number of concurrent connections to the panel.
+        :param cache_collection: Optional Mongo collection persisting resolved email -> server IDs.
+        :param retries: Retries per request after the first attempt.
+        :param base_delay: First backoff delay in seconds, doubled on every retry.
+        :param panel_url: Base URL of your Pterodactyl panel (e.g., https://panel.example.com), defaults to the config.
+        :param api_key: Application (admin) API key from your Pterodactyl panel, defaults to the config.
         """
-        self.panel_url = config.pterodactyl_url.rstrip('/')
-        self.api_key = config.pterodactyl_token
+        self.panel_url = (panel_url or config.pterodactyl_url).rstrip('/')
+        self.api_key = api_key or config.pterodactyl_token
         self.headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Accept": "Application/vnd.pterodactyl.v1+json",
             "Content-Type": "application/json"
         }
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=min(5.0, timeout))
+        self.limit_per_host = limit_per_host
+        self.session = None
+        self.resolutions = ResolutionCache(collection=cache_collection)
+        self.directory = PanelDirectory(self)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.breaker = CircuitBreaker()
+        self._resume_at = 0.0
 
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+    async def start(self):
+        """
+        Open the pooled session; connections are kept alive and DNS lookups cached between requests.
+        """
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit_per_host * 2,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self.session = aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=self.timeout)
+            await self.resolutions.ensure_indexes()
         return self
 
+    async def close(self):
+        self.directory.stop()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
     async def __aexit__(self, exc_type, exc, tb):
-        await self.session.close()
+        await self.close()
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        """
+        Delay before the next attempt: the panel's rate-limit headers if present, else jittered exponential backoff.
+        """
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            reset = response.headers.get("X-RateLimit-Reset")
+            try:
+                if retry_after is not None:
+                    return float(retry_after)
+                if reset is not None:
+                    return max(float(reset) - time.time(), 0)
+            except ValueError:
+                pass
+        delay = self.base_delay * 2 ** attempt
+        return delay + random.uniform(0, delay)
+
+    async def _request(self, method, endpoint, params=None, payload=None, timeout=None):
+        """
+        Perform a request with retries, rate-limit handling and the panel's circuit breaker.
+        Client errors (4xx other than 429) are raised immediately as aiohttp.ClientResponseError.
+        :raises PanelUnavailable: If the circuit is open or every attempt failed.
+        :return: Parsed JSON response, or None for empty (204) responses.
+        """
+        url = f"{self.panel_url}{endpoint}"
+        error = None
+        for attempt in range(self.retries + 1):
+            # Requests wait out a rate limit announced by any earlier response.
+            wait = self._resume_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if not self.breaker.allow():
+                raise PanelUnavailable(f"Circuit open for {self.panel_url}")
+
+            try:
+                async with self.session.request(method, url, params=params, json=payload,
+                                                timeout=timeout or self.timeout) as response:
+                    if response.status == 429 or response.status >= 500:
+                        error = f"{response.status} {response.reason}"
+                        delay = self._retry_delay(attempt, response if response.status == 429 else None)
+                        if response.status == 429:
+                            self.breaker.record_success()
+                            self._resume_at = max(self._resume_at, time.monotonic() + delay)
+                        else:
+                            self.breaker.record_failure()
+                        if attempt < self.retries:
+                            logger.warning(f"Panel {method} {endpoint} failed ({error}), retrying in {delay:.1f}s")
+                            await asyncio.sleep(delay)
+                        continue
+
+                    self.breaker.record_success()
+                    if response.headers.get("X-RateLimit-Remaining") == "0":
+                        self._resume_at = time.monotonic() + self._retry_delay(attempt, response)
+                    response.raise_for_status()
+                    if response.status == 204 or response.content_length == 0:
+                        return None
+                    return await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+                self.breaker.record_failure()
+                # The last attempt raises right away instead of sleeping through a backoff it never uses.
+                if attempt < self.retries:
+                    delay = self._retry_delay(attempt)
+                    logger.warning(f"Panel {method} {endpoint} failed ({error}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+        raise PanelUnavailable(f"Panel {method} {endpoint} failed after {self.retries + 1} attempts: {error}")
 
-    async def _get(self, endpoint, params=None):
+    async def _get(self, endpoint, params=None, timeout=None):
         """
         Internal helper method to perform GET requests.
         :param endpoint: API endpoint starting with a slash (e.g., /api/application/users)
         :param params: Optional dictionary for query parameters.
+        :param timeout: Optional aiohttp.ClientTimeout overriding the session default.
         :return: Parsed JSON response.
         """
-        url = f"{self.panel_url}{endpoint}"
-        async with self.session.get(url, params=params) as response:
-            response.raise_for_status()
-            return await response.json()
+        return await self._request("GET", endpoint, params=params, timeout=timeout)
 
-    async def _post(self, endpoint, payload=None):
+    async def _post(self, endpoint, payload=None, timeout=None):
         """
         Internal helper method to perform POST requests.
         :param endpoint: API endpoint starting with a slash.
         :param payload: Optional JSON payload.
-        :return: Parsed JSON response.
+        :param timeout: Optional aiohttp.ClientTimeout overriding the session default.
+        :return: Parsed JSON response, or None for empty (204) responses.
         """
-        url = f"{self.panel_url}{endpoint}"
-        async with self.session.post(url, json=payload) as response:
-            response.raise_for_status()
-            return await response.json()
+        return await self._request("POST", endpoint, payload=payload, timeout=timeout)
 
     async def get_user_by_email(self, email):
         """
@@ -66,33 +434,96 @@ class PterodactylAPI:
             raise Exception(f"User with email {email} not found")
         return data["data"][0]
 
+    async def get_server_states_by_user_id(self, user_id):
+        """
+        Retrieve the servers of the specified user ID together with their current suspension state.
+        :param user_id: The unique identifier of the user.
+        :return: Dictionary of server ID -> suspended flag.
+        """
+        endpoint = f"/api/application/users/{user_id}?include=servers"
+        data = await self._get(endpoint)
+        return {
+            x["attributes"]["id"]: is_suspended(x["attributes"])
+            for x in data["attributes"]["relationships"]["servers"]["data"]
+        }
+
     async def get_servers_by_user_id(self, user_id):
         """
         Retrieve a list of servers associated with the specified user ID.
         :param user_id: The unique identifier of the user.
         :return: List of servers.
         """
-        endpoint = f"/api/application/users/{user_id}?include=servers"
-        data = await self._get(endpoint)
+        return list(await self.get_server_states_by_user_id(user_id))
+
+    async def get_server_states_by_email(self, email):
+        """
+        Retrieve the servers of an email with their suspension state; a fresh panel directory answers
+        from memory, otherwise one request is made (two if the user ID is not cached yet).
+        :param email: Email address associated with the Pterodactyl user.
+        :return: Dictionary of server ID -> suspended flag (None if unknown).
+        """
+        states = self.directory.states(email)
+        if states is not None:
+            return states
 
-        server = []
+        entry = await self.resolutions.get(email)
+        if entry is not None:
+            try:
+                states = await self.get_server_states_by_user_id(entry["user_id"])
+                await self.resolutions.set(email, entry["user_id"], list(states))
+                return states
+            except aiohttp.ClientResponseError as e:
+                if e.status != 404:
+                    raise
+                await self.resolutions.invalidate(email)
 
-        for x in data["attributes"]["relationships"]["servers"]["data"]:
-            server_id = x["attributes"]["id"]
-            server.append(server_id)
-        return server
+        user = await self.get_user_by_email(email)
+        user_id = user["attributes"].get("id")
+        if not user_id:
+            raise Exception("User record does not contain an ID attribute")
+        states = await self.get_server_states_by_user_id(user_id)
+        await self.resolutions.set(email, user_id, list(states))
+        return states
 
     async def get_servers_by_email(self, email):
         """
-        Retrieve all servers for a user identified by their email.
+        Retrieve all servers for a user identified by their email, served from the panel directory
+        or the resolution cache when possible.
         :param email: Email address associated with the Pterodactyl user.
         :return: List of servers.
         """
+        servers = self.directory.lookup(email)
+        if servers is not None:
+            return servers
+        entry = await self.resolutions.get(email)
+        if entry is not None:
+            return entry["servers"]
+
         user = await self.get_user_by_email(email)
         user_id = user["attributes"].get("id")
         if not user_id:
             raise Exception("User record does not contain an ID attribute")
-        return await self.get_servers_by_user_id(user_id)
+        servers = await self.get_servers_by_user_id(user_id)
+        await self.resolutions.set(email, user_id, servers)
+        return servers
+
+    async def _server_action(self, server_identifier, action):
+        """
+        POST a power state action (suspend/unsuspend) to a single server.
+        :return: HTTP status of the panel's response, 503 if the panel is unavailable.
+        """
+        endpoint = f"/api/application/servers/{server_identifier}/{action}"
+        try:
+            await self._post(endpoint, payload={})
+        except aiohttp.ClientResponseError as e:
+            logger.error(f"Error {action}ing server {server_identifier}: {e.status}")
+            return e.status
+        except PanelUnavailable as e:
+            logger.error(f"Error {action}ing server {server_identifier}: {e}")
+            return 503
+        self.directory.set_suspended(server_identifier, action == "suspend")
+        logger.info(f"Server {server_identifier} {action}ed successfully.")
+        return 204
 
     async def suspend_server(self, server_identifier):
         """
@@ -100,64 +531,82 @@ class PterodactylAPI:
         :param server_identifier: Unique identifier for the server (often a UUID).
         :return: Result of the suspend operation.
         """
-        # The suspend endpoint for a server. The API may not require any payload.
-        endpoint = f"/api/application/servers/{server_identifier}/suspend"
-        request = await self._post(endpoint, payload={})
-        if request.status_code == 204 or request.status_code == 200:
-            logger.info(f"Server {server_identifier} suspended successfully.")
-            return True
-        else:
-            logger.error(f"Error suspending server {server_identifier}: {request.status_code}")
-            return False
+        return await self._server_action(server_identifier, "suspend") == 204
 
     async def unsuspend_server(self, server_identifier):
         """
         Unsuspend a single server using its identifier.
         :param server_identifier: Unique identifier for the server (often a UUID).
-        :return: Result of the suspend operation.
+        :return: Result of the unsuspend operation.
         """
-        # The suspend endpoint for a server. The API may not require any payload.
-        endpoint = f"/api/application/servers/{server_identifier}/unsuspend"
-        request = await self._post(endpoint, payload={})
-        if request.status_code == 204 or request.status_code == 200:
-            logger.info(f"Server {server_identifier} unsuspended successfully.")
-            return True
-        else:
-            logger.error(f"Error unsuspending server {server_identifier}: {request.status_code}")
-            return False
+        return await self._server_action(server_identifier, "unsuspend") == 204
+
+    async def _servers_action_by_email(self, email, action) -> PanelResult:
+        """
+        Bring every server of an email into the action's state, only calling the panel for servers
+        whose current state differs.
+        """
+        target = action == "suspend"
+        result = PanelResult(email=email, action=action)
+        statuses = {}
+        for attempt in range(2):
+            try:
+                states = await self.get_server_states_by_email(email)
+            except Exception as e:
+                result.error = str(e)
+                break
+
+            pending = []
+            for server, state in states.items():
+                if not server or statuses.get(server) == 204:
+                    continue
+                if state is target:
+                    statuses[server] = 204
+                else:
+                    pending.append(server)
+            result.changed += len(pending)
+            statuses.update(zip(pending, await asyncio.gather(*(self._server_action(server, action) for server in pending))))
+            if 404 not in statuses.values():
+                break
+
+            # A 404 means the resolution is stale: drop it and re-read the user's servers once.
+            await self.resolutions.invalidate(email)
+            self.directory.forget(email)
+            statuses = {server: status for server, status in statuses.items() if status != 404}
+
+        if not statuses and result.error is None:
+            result.error = f"No servers found with a valid identifier to {action}"
+        result.servers = {server: status == 204 for server, status in statuses.items()}
+        failed = [str(server) for server, status in statuses.items() if status != 204]
+        if failed and result.error is None:
+            result.error = f"Failed to {action} servers {', '.join(failed)}"
+        result.ok = result.error is None
+        return result
 
-    async def suspend_servers_by_email(self, email):
-        servers = await self.get_servers_by_email(email)
-        tasks = []
-        for server_identifier in servers:
-            # It is common for server objects to store the unique server identifier under "identifier".
-            if server_identifier:
-                tasks.append(self.suspend_server(server_identifier))
-        if not tasks:
-            raise Exception("No servers found with a valid identifier to suspend")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
-
-    async def unsuspend_servers_by_email(self, email):
-        servers = await self.get_servers_by_email(email)
-        tasks = []
-        for server_identifier in servers:
-            # It is common for server objects to store the unique server identifier under "identifier".
-            if server_identifier:
-                tasks.append(self.unsuspend_server(server_identifier))
-        if not tasks:
-            raise Exception("No servers found with a valid identifier to suspend")
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        return results
+    async def apply_action(self, email, action) -> PanelResult:
+        """
+        Run a queued server action ("suspend" or "unsuspend") for every server of an email.
+        """
+        return await self._servers_action_by_email(email, action)
+
+    async def suspend_servers_by_email(self, email) -> PanelResult:
+        return await self._servers_action_by_email(email, "suspend")
+
+    async def unsuspend_servers_by_email(self, email) -> PanelResult:
+        return await self._servers_action_by_email(email, "unsuspend")
 
 
 async def main():
-    email = "spam.yuuto@gmail.com"  # Update with the target user's email
+    parser = argparse.ArgumentParser(description="Suspend or unsuspend every server of a panel user.")
+    parser.add_argument("action", choices=["suspend", "unsuspend"])
+    parser.add_argument("email", help="Email of the Pterodactyl user.")
+    parser.add_argument("--panel-url", help="Panel base URL, defaults to the config.")
+    args = parser.parse_args()
 
-    async with PterodactylAPI() as api:
-        try:
-            results = await api.unsuspend_servers_by_email(email)
-            for res in results:
-                print(res)
-        except Exception as e:
-            print("Error:", e)
+    async with PterodactylAPI(panel_url=args.panel_url) as api:
+        result = await api.apply_action(args.email, args.action)
+        print(result)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
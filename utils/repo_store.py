@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import heapq
+import mmap
+import os
+import re
+import struct
+from bisect import bisect_left
+from collections import defaultdict
+
+from utils.logger import logger
+
+_WORD_SEPARATORS = re.compile(r"[-_. ]+")
+
+# Zip records, see APPNOTE.TXT: end of central directory, its zip64 locator and record, central directory header.
+_EOCD = struct.Struct("<4s4H2LH")
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_HEADER = struct.Struct("<4s6H3L5H2L")
+_MAX_EOCD_SEARCH = _EOCD.size + 0xFFFF
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as archive:
+        for chunk in iter(lambda: archive.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _central_directory(view: mmap.mmap) -> tuple[int, int]:
+    """
+    :return: Tuple of (offset, number of entries) of an archive's central directory.
+    :raises ValueError: If the archive has no end of central directory record.
+    """
+    end = view.rfind(b"PK\x05\x06", max(len(view) - _MAX_EOCD_SEARCH, 0))
+    if end < 0:
+        raise ValueError("not a zip archive")
+    _, _, _, _, entries, _, offset, _ = _EOCD.unpack_from(view, end)
+    locator = end - _ZIP64_LOCATOR.size
+    if locator >= 0 and view[locator:locator + 4] == b"PK\x06\x07":
+        zip64_end = _ZIP64_LOCATOR.unpack_from(view, locator)[2]
+        record = _ZIP64_EOCD.unpack_from(view, zip64_end)
+        entries, offset = record[7], record[9]
+    return offset, entries
+
+
+def _zip64_sizes(extra: bytes, compressed: int, uncompressed: int) -> tuple[int, int]:
+    position = 0
+    while position + 4 <= len(extra):
+        header_id, length = struct.unpack_from("<2H", extra, position)
+        if header_id == 0x0001:
+            values = iter(struct.unpack_from(f"<{length // 8}Q", extra, position + 4))
+            if uncompressed == 0xFFFFFFFF:
+                uncompressed = next(values)
+            if compressed == 0xFFFFFFFF:
+                compressed = next(values)
+            break
+        position += 4 + length
+    return compressed, uncompressed
+
+
+def archive_summary(path: str, largest: int = 10) -> dict:
+    """
+    Summarise an archive from its central directory alone, read through a memory map so only the
+    pages holding the directory are ever loaded.
+    :return: Dictionary with files, size, compressed, layout ({folder: [files, size]}) and largest ([(name, size)]).
+    """
+    with open(path, "rb") as archive, mmap.mmap(archive.fileno(), 0, access=mmap.ACCESS_READ) as view:
+        offset, entries = _central_directory(view)
+        files = []
+        for _ in range(entries):
+            header = _CENTRAL_HEADER.unpack_from(view, offset)
+            if header[0] != b"PK\x01\x02":
+                raise ValueError("corrupt central directory")
+            compressed, uncompressed = header[8], header[9]
+            name_length, extra_length, comment_length = header[10], header[11], header[12]
+            start = offset + _CENTRAL_HEADER.size
+            name = view[start:start + name_length].decode("utf-8", "replace")
+            if 0xFFFFFFFF in (compressed, uncompressed):
+                extra = view[start + name_length:start + name_length + extra_length]
+                compressed, uncompressed = _zip64_sizes(extra, compressed, uncompressed)
+            if not name.endswith("/"):
+                files.append((name, compressed, uncompressed))
+            offset = start + name_length + extra_length + comment_length
+
+    # GitHub zipballs wrap everything in one `org-repo-sha/` folder, the layout starts below it.
+    roots = {name.split("/", 1)[0] for name, _, _ in files}
+    strip = len(next(iter(roots))) + 1 if len(roots) == 1 and all("/" in name for name, _, _ in files) else 0
+    layout = defaultdict(lambda: [0, 0])
+    for name, _, uncompressed in files:
+        relative = name[strip:]
+        top = relative.split("/", 1)[0] + "/" if "/" in relative else relative
+        layout[top][0] += 1
+        layout[top][1] += uncompressed
+    return {
+        "files": len(files),
+        "size": sum(uncompressed for _, _, uncompressed in files),
+        "compressed": sum(compressed for _, compressed, _ in files),
+        "layout": dict(layout),
+        "largest": [(name[strip:], uncompressed)
+                    for name, _, uncompressed in heapq.nlargest(largest, files, key=lambda file: file[2])],
+    }
+
+
+class LocalRepoStore:
+    def __init__(self, directory: str = "./repositories", poll_interval: float = 30):
+        """
+        In-memory index of the local repository archives (name -> size, mtime and SHA-256), so lookups
+        never touch the filesystem. Kept current by the pull and remove paths and by polling the folder.
+        :param directory: Folder holding the <repo>.zip archives.
+        :param poll_interval: Seconds between two scans of the folder.
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.entries = {}
+        self._keys = []
+        self._names = []
+        self._words = []
+        self._summaries = {}
+        self._task = None
+
+    def _rebuild(self) -> None:
+        ordered = sorted((name.lower(), name) for name in self.entries)
+        self._keys = [key for key, _ in ordered]
+        self._names = [name for _, name in ordered]
+        self._words = [tuple(_WORD_SEPARATORS.split(key)) for key in self._keys]
+
+    def add(self, name: str, size: int, mtime: float, sha256: str = None) -> None:
+        new = name not in self.entries
+        self.entries[name] = {"size": size, "mtime": mtime, "sha256": sha256}
+        if new:
+            self._rebuild()
+
+    def discard(self, name: str) -> None:
+        self._summaries.pop(name, None)
+        if self.entries.pop(name, None) is not None:
+            self._rebuild()
+
+    def get(self, name: str):
+        return self.entries.get(name)
+
+    async def summary(self, name: str):
+        """
+        Summary of an archive's contents (see archive_summary), cached until the archive changes.
+        :return: The summary, or None if the archive is not in the store.
+        """
+        entry = self.entries.get(name)
+        if entry is None:
+            return None
+        cached = self._summaries.get(name)
+        if cached is not None and cached[0] == (entry["size"], entry["mtime"]):
+            return cached[1]
+        summary = await asyncio.to_thread(archive_summary, os.path.join(self.directory, f"{name}.zip"))
+        self._summaries[name] = ((entry["size"], entry["mtime"]), summary)
+        return summary
+
+    def names(self) -> list[str]:
+        return list(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, current: str, limit: int = 25) -> list[str]:
+        """
+        Ranked lookup: exact and prefix matches (found by bisection), then word prefix, substring
+        and fuzzy matches, shorter names first within a rank.
+        """
+        query = current.lower()
+        start = bisect_left(self._keys, query)
+        prefix = []
+        for index in range(start, len(self._keys)):
+            if not self._keys[index].startswith(query) or len(prefix) >= limit:
+                break
+            prefix.append(index)
+        if len(prefix) >= limit or not query:
+            prefix.sort(key=lambda index: (len(self._keys[index]), self._keys[index]))
+            return [self._names[index] for index in prefix[:limit]]
+
+        # Ranks: 0 exact, 1 prefix, 2 word prefix, 3 substring, 4 fuzzy (the query's letters in order).
+        fuzzy = re.compile(".*?".join(map(re.escape, query)))
+        ranked = []
+        for index, key in enumerate(self._keys):
+            if query in key:
+                if key == query:
+                    rank = 0
+                elif key.startswith(query):
+                    rank = 1
+                elif any(word.startswith(query) for word in self._words[index]):
+                    rank = 2
+                else:
+                    rank = 3
+            elif fuzzy.search(key):
+                rank = 4
+            else:
+                continue
+            ranked.append((rank, len(key), key, self._names[index]))
+        return [name for *_, name in heapq.nsmallest(limit, ranked)]
+
+    def _scan(self) -> dict:
+        found = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.is_file() and entry.name.endswith(".zip"):
+                        stat = entry.stat()
+                        found[entry.name[:-4]] = (stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            pass
+        return found
+
+    async def refresh(self) -> None:
+        """
+        Scan the folder in a thread, then hash new or modified archives one at a time.
+        """
+        found = await asyncio.to_thread(self._scan)
+        changed = False
+        for name in set(self.entries) - set(found):
+            del self.entries[name]
+            changed = True
+        to_hash = []
+        for name, (size, mtime) in found.items():
+            entry = self.entries.get(name)
+            if entry is None or entry["size"] != size or entry["mtime"] != mtime:
+                changed = changed or entry is None
+                self.entries[name] = {"size": size, "mtime": mtime, "sha256": None}
+                to_hash.append(name)
+        if changed:
+            self._rebuild()
+
+        for name in to_hash:
+            try:
+                sha256 = await asyncio.to_thread(hash_file, os.path.join(self.directory, f"{name}.zip"))
+            except OSError:
+                continue
+            entry = self.entries.get(name)
+            # Skip archives replaced while they were being hashed, the next scan picks them up.
+            if entry is not None and (entry["size"], entry["mtime"]) == found[name]:
+                entry["sha256"] = sha256
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to scan local repositories: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+local_repos = LocalRepoStore()
@@ -0,0 +1,200 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+
+from utils.logger import logger
+
+# Reminder stages of an overdue subscription, as offsets from its due date.
+STAGES = (
+    ("warned", timedelta(days=1)),
+    ("final_warning", timedelta(days=7)),
+    ("suspended", timedelta(days=8)),
+)
+
+# Upper bound for a single sleep, so wall-clock jumps never delay a deadline for long.
+MAX_SLEEP = 300
+
+# Delay before due entries are fired again after the callback failed on them.
+RETRY_DELAY = 60
+
+
+def current_stage(next_payment: datetime, now: datetime = None):
+    """
+    Return the latest stage whose deadline has passed for the given due date.
+    :param next_payment: The subscription's due date.
+    :param now: Reference time, defaults to the current time.
+    :return: Stage name or None if the subscription is not overdue yet.
+    """
+    now = now or datetime.now()
+    stage = None
+    for name, offset in STAGES:
+        if next_payment + offset > now:
+            break
+        stage = name
+    return stage
+
+
+def handled_stage(document: dict):
+    """
+    Return the latest stage the subscription's ledger records for its current billing period.
+    :param document: Subscription document including its `reminders` ledger.
+    :return: Stage name or None if no stage was handled yet.
+    """
+    ledger = document.get("reminders") or {}
+    stage = None
+    for name, _ in STAGES:
+        entry = ledger.get(name)
+        if entry and entry.get("period") == document.get("next_payment"):
+            stage = name
+    return stage
+
+
+def needs_unsuspend(document: dict) -> bool:
+    """
+    Whether the subscription's servers were suspended by the bot and not unsuspended since. Servers staff
+    suspended by hand are never recorded in the ledger and are left alone.
+    :param document: Subscription document including its `reminders` ledger.
+    :return: True if the ledger records a suspension that was never undone, or if there is no ledger (legacy documents).
+    """
+    ledger = document.get("reminders")
+    if ledger is None:
+        return True
+    suspended = ledger.get("suspended")
+    unsuspended = ledger.get("unsuspended")
+    return suspended is not None and (unsuspended is None or unsuspended["at"] < suspended["at"])
+
+
+class SubscriptionScheduler:
+    def __init__(self):
+        """
+        In-process min-heap of reminder deadlines, holding one live entry per subscription.
+        Replaced and cancelled entries stay in the heap and are skipped when popped.
+        """
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._callback = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _push(self, user_id: int, stage: str, next_payment: datetime, when: datetime) -> None:
+        entry = (when, next(self._counter), user_id, stage, next_payment)
+        self._entries[user_id] = entry
+        heapq.heappush(self._heap, entry)
+
+        # Drop stale entries once they outweigh the live ones.
+        if len(self._heap) > 2 * len(self._entries) + 1024:
+            self._heap = list(self._entries.values())
+            heapq.heapify(self._heap)
+
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def track(self, user_id: int, next_payment: datetime, now: datetime = None) -> None:
+        """
+        (Re)schedule a subscription from its due date. A stage whose deadline already passed fires immediately.
+        :param user_id: Discord user ID, the subscription's _id.
+        :param next_payment: The subscription's due date.
+        :param now: Reference time, defaults to the current time.
+        """
+        if next_payment is None:
+            self.cancel(user_id)
+            return
+        stage = current_stage(next_payment, now)
+        for name, offset in STAGES:
+            if stage is None or name == stage:
+                self._push(user_id, name, next_payment, next_payment + offset)
+                return
+
+    def advance(self, user_id: int, stage: str, next_payment: datetime) -> None:
+        """
+        Schedule the stage following the one that just fired, or stop tracking after the last one.
+        """
+        names = [name for name, _ in STAGES]
+        index = names.index(stage) + 1
+        if index < len(STAGES):
+            name, offset = STAGES[index]
+            self._push(user_id, name, next_payment, next_payment + offset)
+        else:
+            self.cancel(user_id)
+
+    def cancel(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+    def pop_due(self, now: datetime = None) -> list:
+        """
+        Pop every live entry whose deadline has passed.
+        :return: List of (user_id, stage, next_payment) tuples.
+        """
+        now = now or datetime.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            user_id = entry[2]
+            if self._entries.get(user_id) is not entry:
+                continue
+            del self._entries[user_id]
+            due.append((user_id, entry[3], entry[4]))
+        return due
+
+    def requeue(self, due: list, when: datetime) -> None:
+        """
+        Put popped entries back that the callback did not reschedule, e.g. because it raised partway through.
+        :param due: List of (user_id, stage, next_payment) tuples, see pop_due.
+        :param when: Time the entries fire again.
+        """
+        for user_id, stage, next_payment in due:
+            if user_id not in self._entries:
+                self._push(user_id, stage, next_payment, when)
+
+    def next_deadline(self):
+        while self._heap and self._entries.get(self._heap[0][2]) is not self._heap[0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def _run(self) -> None:
+        while True:
+            deadline = self.next_deadline()
+            timeout = MAX_SLEEP
+            if deadline is not None:
+                timeout = min(max((deadline - datetime.now()).total_seconds(), 0), MAX_SLEEP)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                continue
+            except asyncio.TimeoutError:
+                pass
+
+            due = self.pop_due()
+            if not due:
+                continue
+            try:
+                await self._callback(due)
+            except Exception as e:
+                logger.error(f"Subscription scheduler failed to process {len(due)} due entries: {e}")
+                self.requeue(due, datetime.now() + timedelta(seconds=RETRY_DELAY))
+
+    def start(self, callback) -> None:
+        """
+        Start firing due entries.
+        :param callback: Coroutine function receiving the list returned by pop_due.
+        """
+        self._callback = callback
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._entries.clear()
+
+
+subscription_scheduler = SubscriptionScheduler()
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from utils.cache import TTLCache
+from utils.database import mongodb
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+
+def stats_pipeline(now: datetime) -> list:
+    """
+    Aggregation computing every subscription figure in one round-trip; only summary rows leave the database.
+    :param now: Reference time for overdue calculations.
+    """
+    interval = {"$max": [{"$ifNull": ["$interval", 1]}, 1]}
+    price = {"$ifNull": ["$price", 0]}
+    return [
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "subscriptions": {"$sum": 1},
+                    "mrr": {"$sum": {"$divide": [price, interval]}},
+                    "overdue": {"$sum": {"$cond": [{"$and": [
+                        {"$eq": [{"$type": "$next_payment"}, "date"]},
+                        {"$lt": ["$next_payment", now]},
+                    ]}, 1, 0]}},
+                    "suspended": {"$sum": {"$cond": ["$overdue_run", 1, 0]}},
+                }},
+            ],
+            "overdue": [
+                # Missing or null dates sort below every date, match only real due dates.
+                {"$match": {"next_payment": {"$type": "date", "$lt": now}}},
+                {"$bucket": {
+                    "groupBy": {"$floor": {"$divide": [{"$subtract": [now, "$next_payment"]}, DAY_MS]}},
+                    "boundaries": [0, 1, 7, 8],
+                    "default": 8,
+                    "output": {"count": {"$sum": 1}, "amount": {"$sum": price}},
+                }},
+            ],
+            "intervals": [
+                {"$group": {
+                    "_id": "$interval",
+                    "count": {"$sum": 1},
+                    "revenue": {"$sum": price},
+                    "mrr": {"$sum": {"$divide": [price, interval]}},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+        }},
+    ]
+
+
+class SubscriptionStats:
+    def __init__(self, ttl: float = 60.0):
+        self.cache = TTLCache(maxsize=1, ttl=ttl)
+
+    async def overview(self) -> dict:
+        """
+        Revenue and delinquency figures for all subscriptions, cached for a short TTL.
+        :return: Dictionary with `totals`, `overdue` buckets keyed by their lower bound in days and `intervals`.
+        """
+        stats = self.cache.get("overview")
+        if stats is not None:
+            return stats
+
+        collection = mongodb.get_database("ByteScrape")["subscriptions"]
+        result = await collection.aggregate(stats_pipeline(datetime.now())).to_list(length=1)
+        facets = result[0] if result else {}
+        totals = (facets.get("totals") or [{}])[0]
+        stats = {
+            "totals": {
+                "subscriptions": totals.get("subscriptions", 0),
+                "mrr": totals.get("mrr", 0),
+                "overdue": totals.get("overdue", 0),
+                "suspended": totals.get("suspended", 0),
+            },
+            "overdue": {bucket["_id"]: bucket for bucket in facets.get("overdue", [])},
+            "intervals": facets.get("intervals", []),
+        }
+        self.cache.set("overview", stats)
+        return stats
+
+    def invalidate(self) -> None:
+        self.cache.clear()
+
+
+subscription_stats = SubscriptionStats()
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import aiofiles
+from dateutil.relativedelta import relativedelta
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+FIELDS = ["user_id", "price", "interval", "last_paid", "next_payment", "email"]
+CHUNK_SIZE = 1000
+
+
+def parse_date(value: str):
+    if not value:
+        return None
+    try:
+        return datetime.strptime(str(value), "%d-%m-%Y")
+    except ValueError:
+        return datetime.fromisoformat(str(value))
+
+
+def read_rows(text: str, fmt: str):
+    """
+    Lazily read raw rows from a CSV (with header) or JSONL export.
+    :return: Generator of (row_number, dict) tuples, the dict is None for unreadable lines.
+    """
+    if fmt == "csv":
+        for row_number, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+            yield row_number, row
+        return
+    for row_number, line in enumerate(io.StringIO(text), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError:
+            yield row_number, None
+
+
+def build_document(row: dict, now: datetime) -> dict:
+    """
+    Turn an import row into a subscription document, like /add_subscription would.
+    :raises ValueError: If a required column is missing or malformed.
+    """
+    if row is None:
+        raise ValueError("unreadable line")
+    try:
+        user_id = int(row["user_id"])
+        price = float(row["price"])
+        interval = int(row["interval"])
+    except KeyError as e:
+        raise ValueError(f"missing column {e}")
+    except (TypeError, ValueError):
+        raise ValueError("user_id, price and interval must be numbers")
+    if interval < 1:
+        raise ValueError("interval must be at least 1 month")
+
+    last_paid = parse_date(row.get("last_paid")) or now
+    next_payment = parse_date(row.get("next_payment")) or last_paid + relativedelta(months=interval)
+    return {
+        "_id": user_id,
+        "price": price,
+        "interval": interval,
+        "last_paid": last_paid,
+        "next_payment": next_payment,
+        "overdue_run": False,
+        "email": row.get("email") or None,
+    }
+
+
+def upsert_operation(document: dict) -> UpdateOne:
+    """
+    Upsert an imported subscription. A moved due date starts a new billing period, so the reminder
+    ledger and overdue flag are reset; otherwise both are kept.
+    """
+    fields = {key: {"$literal": value} for key, value in document.items() if key not in ("_id", "overdue_run")}
+    moved = {"$ne": [{"$ifNull": ["$next_payment", None]}, {"$literal": document["next_payment"]}]}
+    fields["reminders"] = {"$cond": [moved, {}, {"$ifNull": ["$reminders", {}]}]}
+    fields["overdue_run"] = {"$cond": [moved, False, {"$ifNull": ["$overdue_run", False]}]}
+    return UpdateOne({"_id": document["_id"]}, [{"$set": fields}], upsert=True)
+
+
+async def import_subscriptions(collection, rows) -> tuple[list, list]:
+    """
+    Upsert import rows with chunked, unordered bulk writes.
+    :param collection: Subscriptions collection.
+    :param rows: Iterable of (row_number, dict) tuples, see read_rows.
+    :return: Tuple of (imported documents, [(row_number, error)]).
+    """
+    now = datetime.now()
+    imported = []
+    errors = []
+    chunk = []
+
+    async def flush():
+        operations = [upsert_operation(doc) for _, doc in chunk]
+        failed = set()
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                errors.append((chunk[error["index"]][0], error.get("errmsg", "write failed")))
+        imported.extend(doc for index, (_, doc) in enumerate(chunk) if index not in failed)
+        chunk.clear()
+
+    for row_number, row in rows:
+        try:
+            chunk.append((row_number, build_document(row, now)))
+        except ValueError as e:
+            errors.append((row_number, str(e)))
+            continue
+        if len(chunk) >= CHUNK_SIZE:
+            await flush()
+    if chunk:
+        await flush()
+    return imported, errors
+
+
+def _export_row(document: dict) -> dict:
+    row = {field: document.get(field) for field in FIELDS}
+    row["user_id"] = document.get("_id")
+    for field in ("last_paid", "next_payment"):
+        if isinstance(row[field], datetime):
+            row[field] = row[field].isoformat()
+    return row
+
+
+async def export_subscriptions(collection, fmt: str, path: str) -> int:
+    """
+    Stream every subscription into a CSV or JSONL file, one cursor batch at a time.
+    :return: Number of exported subscriptions.
+    """
+    count = 0
+    async with aiofiles.open(path, "w", encoding="utf-8", newline="") as out_file:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS)
+        if fmt == "csv":
+            writer.writeheader()
+
+        async for document in collection.find({}).batch_size(CHUNK_SIZE):
+            row = _export_row(document)
+            if fmt == "csv":
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row) + "\n")
+            count += 1
+            if count % CHUNK_SIZE == 0:
+                await out_file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+        await out_file.write(buffer.getvalue())
+    return count
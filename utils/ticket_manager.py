@@ -1,9 +1,121 @@
 import asyncio
 import datetime
+from collections import deque
+
 import discord
 from discord.ui import Button, View
 from utils.config import Config
 from utils.embed import create_embed  # Import your custom embed creator
+from utils.logger import logger
+
+POOL_TOPIC = "Unclaimed ticket"
+
+
+def ticket_permissions(**overrides) -> discord.PermissionOverwrite:
+    permissions = dict(
+        send_messages=True,
+        embed_links=True,
+        attach_files=True,
+        read_messages=True,
+        external_emojis=True,
+        read_message_history=True,
+        external_stickers=True
+    )
+    permissions.update(overrides)
+    return discord.PermissionOverwrite(**permissions)
+
+
+class TicketPool:
+    def __init__(self, size: int = 3, retry_delay: float = 5, max_retry_delay: float = 300):
+        """
+        Warm pool of hidden ticket channels per ticket category, already carrying the default role and
+        team overwrites, so claiming a ticket is a single channel edit. Pool channels are recognised by
+        their topic and adopted again after a restart.
+        :param size: Channels kept ready per category.
+        :param retry_delay: Seconds before a failed channel creation is retried, doubled on every failure.
+        :param max_retry_delay: Upper bound of the retry delay in seconds.
+        """
+        self.size = size
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.config = Config()
+        self.client = None
+        self.channels = {}
+        self._task = None
+
+    def category_ids(self) -> list[int]:
+        return [int(category_id) for category_id in self.config.config["bot"]["ids"]["categories"].values()]
+
+    def overwrites(self, guild: discord.Guild, team_visible: bool = True) -> dict:
+        """
+        :param team_visible: False for unclaimed pool channels, so the team does not see them until a claim.
+        """
+        overwrites = {guild.default_role: ticket_permissions(read_messages=False)}
+        team_role = guild.get_role(int(self.config.team_id))
+        if team_role is not None:
+            overwrites[team_role] = ticket_permissions(read_messages=team_visible)
+        return overwrites
+
+    def start(self, client: discord.Client) -> None:
+        self.client = client
+        for category_id in self.category_ids():
+            category = client.get_channel(category_id)
+            pooled = [channel.id for channel in getattr(category, "text_channels", []) if channel.topic == POOL_TOPIC]
+            self.channels[category_id] = deque(pooled)
+        self.refill_later()
+
+    def claim(self, category_id: int):
+        """
+        :return: A warm channel of the category, or None if its pool is empty.
+        """
+        pool = self.channels.get(category_id)
+        while pool:
+            channel = self.client.get_channel(pool.popleft())
+            # Skip channels deleted or taken over by hand since they were pooled.
+            if channel is not None and channel.topic == POOL_TOPIC:
+                return channel
+        return None
+
+    def refill_later(self) -> None:
+        if self.client is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        # Keep going until every pool is full, tickets claimed during a refill are topped up too.
+        delay = self.retry_delay
+        while True:
+            missing = [(category_id, pool) for category_id, pool in self.channels.items() if len(pool) < self.size]
+            if not missing:
+                return
+            for category_id, pool in missing:
+                category = self.client.get_channel(category_id)
+                if category is None:
+                    self.channels.pop(category_id)
+                    continue
+                try:
+                    channel = await category.guild.create_text_channel(
+                        name="unclaimed",
+                        category=category,
+                        topic=POOL_TOPIC,
+                        overwrites=self.overwrites(category.guild, team_visible=False)
+                    )
+                except discord.HTTPException as e:
+                    logger.error(f"Failed to create a pooled ticket channel in {category.name}, "
+                                 f"retrying in {delay:.0f}s: {e}")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_retry_delay)
+                    break
+                delay = self.retry_delay
+                pool.append(channel.id)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+ticket_pool = TicketPool()
+
 
 class TicketHandler:
     def __init__(self, interaction: discord.Interaction, client: discord.Client) -> None:
@@ -12,50 +124,29 @@ class TicketHandler:
         self.config = Config()
 
     async def ticket(self) -> None:
+        await self.interaction.response.defer(ephemeral=True, thinking=True)
         # Determine the category via the selected service value
         service_value = self.interaction.data.get("values", [None])[0]
         category_id = int(self.config.config["bot"]["ids"]["categories"].get(service_value, 0))
-        category = self.client.get_channel(category_id)
-        channel = await self.interaction.guild.create_text_channel(
-            name=f"{self.interaction.user.name}",
-            category=category,
-            topic=f"Ticket from {self.interaction.user.name}"
-        )
+        user = self.interaction.user
 
-        # Set permissions: disable for default role and enable for team and ticket creator
-        await channel.set_permissions(
-            self.interaction.guild.default_role,
-            send_messages=True,
-            embed_links=True,
-            attach_files=True,
-            read_messages=False,
-            external_emojis=True,
-            read_message_history=True,
-            external_stickers=True
-        )
-        team_role = self.interaction.guild.get_role(int(self.config.team_id))
-        await channel.set_permissions(
-            team_role,
-            send_messages=True,
-            embed_links=True,
-            attach_files=True,
-            read_messages=True,
-            external_emojis=True,
-            read_message_history=True,
-            external_stickers=True
-        )
-        await channel.set_permissions(
-            self.interaction.user,
-            send_messages=True,
-            embed_links=True,
-            attach_files=True,
-            read_messages=True,
-            external_emojis=True,
-            read_message_history=True,
-            external_stickers=True
-        )
+        # Claim a warm channel with one edit that also reveals it to the team; only an empty pool falls back
+        # to creating the channel.
+        channel = ticket_pool.claim(category_id)
+        if channel is not None:
+            overwrites = {**channel.overwrites, **ticket_pool.overwrites(self.interaction.guild)}
+            overwrites[user] = ticket_permissions()
+            await channel.edit(name=f"{user.name}", topic=f"Ticket from {user.name}", overwrites=overwrites)
+        else:
+            channel = await self.interaction.guild.create_text_channel(
+                name=f"{user.name}",
+                category=self.client.get_channel(category_id),
+                topic=f"Ticket from {user.name}",
+                overwrites={**ticket_pool.overwrites(self.interaction.guild), user: ticket_permissions()}
+            )
+        ticket_pool.refill_later()
 
-        await self.interaction.response.send_message(f"Your Ticket got created {channel.mention}", ephemeral=True)
+        await self.interaction.followup.send(f"Your Ticket got created {channel.mention}", ephemeral=True)
 
         # Create embed using the create_embed function
         embed = create_embed(
@@ -0,0 +1,155 @@
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+import aiohttp
+from aiohttp import web
+
+from utils.logger import logger
+
+
+def sign(secret: str, body: bytes) -> str:
+    """
+    :return: The X-Hub-Signature-256 header GitHub sends for a body.
+    """
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str) -> bool:
+    if not signature:
+        return False
+    return hmac.compare_digest(sign(secret, body), signature)
+
+
+def pushed_repo(payload: dict):
+    """
+    Read the pushed repository from a push event, in the shape of the catalogue's repository records.
+    :return: Dictionary with the repository's name and pushed_at, or None for pushes to other branches.
+    """
+    repository = payload.get("repository")
+    if not isinstance(repository, dict) or not repository.get("name") or payload.get("ref") != f"refs/heads/{repository.get('default_branch')}":
+        return None
+    pushed_at = repository.get("pushed_at")
+    if isinstance(pushed_at, (int, float)):
+        # Push events carry a timestamp where the REST API has an ISO 8601 date.
+        pushed_at = datetime.fromtimestamp(pushed_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"name": repository["name"], "pushed_at": pushed_at}
+
+
+class PushWebhook:
+    def __init__(self, handler, secret: str, host: str = "0.0.0.0", port: int = 8090, path: str = "/github",
+                 debounce: float = 10):
+        """
+        Embedded receiver for GitHub push webhooks. Bursts of pushes to one repository are debounced
+        into a single call of the handler with the latest push.
+        :param handler: Callable receiving the pushed repository ({"name", "pushed_at"}).
+        :param secret: Webhook secret used to verify X-Hub-Signature-256.
+        :param host: Interface to listen on.
+        :param port: Port to listen on.
+        :param path: Path of the webhook endpoint.
+        :param debounce: Seconds without a new push before a repository is handed to the handler.
+        """
+        self.handler = handler
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self.debounce = debounce
+        self._pending = {}
+        self._runner = None
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=25 * 1024 * 1024)
+        app.router.add_post(self.path, self.receive)
+        return app
+
+    async def receive(self, request: web.Request) -> web.Response:
+        body = await request.read()
+        if not verify_signature(self.secret, body, request.headers.get("X-Hub-Signature-256")):
+            logger.warning(f"Rejected GitHub webhook with an invalid signature from {request.remote}")
+            return web.Response(status=401, text="invalid signature")
+
+        event = request.headers.get("X-GitHub-Event")
+        if event == "ping":
+            return web.Response(text="pong")
+        if event != "push":
+            return web.Response(status=202, text="ignored")
+        try:
+            repo = pushed_repo(self.parse(request, body))
+        except (ValueError, TypeError):
+            return web.Response(status=400, text="invalid payload")
+        if repo is None:
+            return web.Response(status=202, text="ignored")
+        self.schedule(repo)
+        return web.Response(status=202, text="queued")
+
+    @staticmethod
+    def parse(request: web.Request, body: bytes) -> dict:
+        """
+        Read the payload of a delivery, sent as JSON or as a form with a `payload` field depending on the
+        webhook's content type.
+        :raises ValueError: If the body holds no JSON object.
+        """
+        if request.content_type == "application/x-www-form-urlencoded":
+            body = parse_qs(body.decode()).get("payload", [""])[0]
+        payload = json.loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("payload is not a JSON object")
+        return payload
+
+    def schedule(self, repo: dict) -> None:
+        """
+        (Re)start the repository's debounce timer, the latest push wins.
+        """
+        pending = self._pending.get(repo["name"])
+        if pending is not None:
+            pending.cancel()
+        self._pending[repo["name"]] = asyncio.get_running_loop().call_later(self.debounce, self._fire, repo)
+
+    def _fire(self, repo: dict) -> None:
+        self._pending.pop(repo["name"], None)
+        logger.info(f"Push to {repo['name']} received, refreshing its archive")
+        self.handler(repo)
+
+    async def start(self) -> None:
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.debug(f"Listening for GitHub webhooks on {self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        for pending in self._pending.values():
+            pending.cancel()
+        self._pending.clear()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def replay():
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub webhook payloads against the bot.")
+    parser.add_argument("payloads", nargs="+", help="JSON files holding recorded payloads.")
+    parser.add_argument("--url", default="http://127.0.0.1:8090/github")
+    parser.add_argument("--secret", required=True, help="Webhook secret from the config.")
+    parser.add_argument("--event", default="push", help="Value of the X-GitHub-Event header.")
+    args = parser.parse_args()
+
+    async with aiohttp.ClientSession() as session:
+        for path in args.payloads:
+            with open(path, "rb") as payload_file:
+                body = payload_file.read()
+            headers = {
+                "Content-Type": "application/json",
+                "X-GitHub-Event": args.event,
+                "X-Hub-Signature-256": sign(args.secret, body),
+            }
+            async with session.post(args.url, data=body, headers=headers) as response:
+                print(f"{path}: {response.status} {await response.text()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(replay())